@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import Union
+
+import numpy as np
+import soundfile as sf
+
+from audio.gain import GainRamp
+from audio.mixer import Mixer
+from global_config import config
+from utils.metrics import BLOCK_RENDER
+
+AUDIO_BACKENDS = ("portaudio", "null", "wav")
+
+
+class OutputBackend:
+    """
+    Destination of the mix rendered by the playback thread.
+
+    The base implementation renders one block at a time, applies the microphone
+    volume and hands the block to write. Realtime backends render at the pace of
+    a device; the others render as fast as the CPU allows, which makes offline
+    rendering and throughput measurements possible.
+    """
+
+    name = "base"
+
+    def __init__(self, realtime: bool = True) -> None:
+        """
+        Initialize the backend.
+
+        :param realtime: Whether to render at the pace of a device.
+        """
+
+        self.realtime = realtime
+
+    @property
+    def device(self) -> Union[dict, None]:
+        """
+        The playback device, if the backend plays on one.
+        """
+
+        return None
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether the outputs still deliver audio. False once a device is lost.
+        """
+
+        return True
+
+    def open(self) -> None:
+        """
+        Open the outputs ahead of the first play. Called from a worker thread.
+        """
+
+    def close(self) -> None:
+        """
+        Close the outputs.
+        """
+
+    def reinitialize(self) -> None:
+        """
+        Enumerate the devices again. The outputs must be closed beforehand.
+        """
+
+    def write(self, block: np.ndarray) -> None:
+        """
+        Consume a rendered block.
+
+        :param block: Block shaped (frames, channels), reused for the next block.
+        """
+
+    def run(
+        self,
+        mixer: Mixer,
+        stop_event: threading.Event,
+        frames: Union[int, None] = None,
+    ) -> int:
+        """
+        Render the mixer until stopped, or until the given number of frames is
+        rendered. Returns the number of frames rendered.
+
+        :param mixer: The mixer to render.
+        :param stop_event: Event that stops the rendering once set.
+        :param frames: Number of frames to render, or None to render until stopped.
+        """
+
+        mix = np.zeros((config.chunk_size, config.channels), dtype="float32")
+        output = np.empty_like(mix)
+        gain = GainRamp(config.chunk_size, config.channels, config.microphone_volume)
+        block_duration = config.chunk_size / config.samplerate
+
+        rendered = 0
+        deadline = time.perf_counter()
+        while not stop_event.is_set() and (frames is None or rendered < frames):
+            started = time.perf_counter()
+            mixer.render(mix)
+            BLOCK_RENDER.observe(time.perf_counter() - started)
+
+            np.copyto(output, mix)
+            gain.apply(output, config.microphone_volume)
+
+            block = output[: frames - rendered] if frames is not None else output
+            self.write(block)
+            rendered += len(block)
+
+            if self.realtime:
+                deadline = max(deadline + block_duration, started)
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+
+        return rendered
+
+
+class NullBackend(OutputBackend):
+    """
+    Discards the mix, so the engine runs and can be profiled on a host without
+    audio devices.
+    """
+
+    name = "null"
+
+
+class WavBackend(OutputBackend):
+    """
+    Writes the mix, as sent to the microphone device, to a 32-bit float WAV file
+    so rendered output can be compared sample for sample.
+    """
+
+    name = "wav"
+
+    def __init__(self, path: str, realtime: bool = True) -> None:
+        """
+        Initialize the backend.
+
+        :param path: Path of the WAV file, overwritten when opened.
+        :param realtime: Whether to render at the pace of a device.
+        """
+
+        super().__init__(realtime)
+        self.path = path
+
+        self._file: Union[sf.SoundFile, None] = None
+
+    def open(self) -> None:
+        if self._file is None:
+            self._file = sf.SoundFile(
+                self.path,
+                "w",
+                samplerate=config.samplerate,
+                channels=config.channels,
+                subtype="FLOAT",
+            )
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, block: np.ndarray) -> None:
+        self._file.write(block)
+
+
+def create_backend(name: str) -> OutputBackend:
+    """
+    Create the output backend with the given name. The PortAudio backend is only
+    imported when used, so the other backends run without PortAudio installed.
+
+    :param name: One of the audio backends.
+    """
+
+    if name == "null":
+        return NullBackend()
+
+    if name == "wav":
+        return WavBackend(config.wav_output_path)
+
+    if name == "portaudio":
+        from audio.portaudio_backend import PortAudioBackend
+
+        return PortAudioBackend()
+
+    raise ValueError(f"Audio backend must be one of {AUDIO_BACKENDS}")
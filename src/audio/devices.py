@@ -0,0 +1,103 @@
+import threading
+from typing import Union
+
+import sounddevice as sd
+
+from utils.errors import PlaybackDeviceAmbiguousError, PlaybackDeviceNotFoundError
+from utils.logger import get_logger
+
+log = get_logger("audio")
+
+
+def reinitialize_portaudio() -> None:
+    """
+    Terminate and initialize PortAudio again, which is the only way to have it
+    enumerate devices again. Every stream must be closed beforehand.
+    """
+
+    # sounddevice has no public API for this. _terminate and _initialize are
+    # private as of sounddevice 0.5.1, the version pinned in uv.lock, so check
+    # they still exist before relying on them.
+    terminate = getattr(sd, "_terminate", None)
+    initialize = getattr(sd, "_initialize", None)
+    if terminate is None or initialize is None:
+        log.warning("🔊 This sounddevice version can not enumerate devices again")
+        return
+
+    terminate()
+    initialize()
+
+
+class DeviceResolver:
+    """
+    Resolves the playback device from the configured match rules.
+
+    The resolved device is cached until PortAudio is reinitialized or the rules
+    change, so devices are only enumerated when the device list may actually have
+    changed.
+    """
+
+    def __init__(self) -> None:
+        self._device: Union[dict, None] = None
+        self._rules: Union[tuple[str, Union[int, None]], None] = None
+        self._lock = threading.Lock()
+
+    @property
+    def device(self) -> Union[dict, None]:
+        """
+        The cached playback device, if resolved.
+        """
+
+        return self._device
+
+    def resolve(self, name_match: str, host_api: Union[int, None]) -> int:
+        """
+        Get the index of the playback device, enumerating devices on a cache miss.
+
+        :param name_match: Case-insensitive substring of the device name.
+        :param host_api: Index of the host API the device must belong to, or None
+            to accept any host API.
+        """
+
+        rules = (name_match.lower(), host_api)
+
+        with self._lock:
+            if self._device is not None and self._rules == rules:
+                return self._device["index"]
+
+            matches = [
+                device
+                for device in sd.query_devices()
+                if rules[0] in device["name"].lower()
+                and device["max_output_channels"] > 0
+                and (host_api is None or device["hostapi"] == host_api)
+            ]
+
+            if not matches:
+                raise PlaybackDeviceNotFoundError(f"No device matching '{name_match}'")
+
+            if len(matches) > 1:
+                raise PlaybackDeviceAmbiguousError(
+                    f"Multiple devices matching '{name_match}'"
+                )
+
+            self._device = {
+                "index": matches[0]["index"],
+                "name": matches[0]["name"],
+                "hostapi": matches[0]["hostapi"],
+            }
+            self._rules = rules
+
+            return self._device["index"]
+
+    def reinitialize(self) -> None:
+        """
+        Reinitialize PortAudio so devices plugged in or removed since startup are
+        enumerated. Every stream must be closed beforehand.
+        """
+
+        with self._lock:
+            reinitialize_portaudio()
+
+            self._device = None
+            self._rules = None
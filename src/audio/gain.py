@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class GainRamp:
+    """
+    Applies a gain to blocks of frames in place.
+
+    When the gain changes, it is ramped linearly across the next block instead of
+    stepping, which avoids audible clicks when a volume slider moves. A block
+    shorter than the ramp only covers part of it, and the next block continues
+    from the gain actually reached.
+    """
+
+    def __init__(self, frames: int, channels: int, gain: float = 1.0) -> None:
+        """
+        Initialize the gain ramp.
+
+        :param frames: Largest block size the ramp is applied to.
+        :param channels: Channel count of the blocks.
+        :param gain: Gain applied to the first block.
+        """
+
+        self.gain = gain
+
+        ramp = np.linspace(1 / frames, 1, frames, dtype=np.float32)[:, None]
+        self._ramp = np.repeat(ramp, channels, axis=1)
+        self._gains = np.empty((frames, channels), dtype=np.float32)
+
+    def apply(self, data: np.ndarray, target: float) -> None:
+        """
+        Multiply a block in place by the gain, ramping from the last applied gain
+        to the target gain across the block.
+
+        :param data: Block shaped (frames, channels), modified in place.
+        :param target: Gain to reach at the end of a full-length block.
+        """
+
+        if target == self.gain:
+            data *= target
+            return
+
+        frames = len(data)
+        if frames == 0:
+            return
+
+        gains = self._gains[:frames]
+        np.multiply(self._ramp[:frames], target - self.gain, out=gains)
+        gains += self.gain
+        data *= gains
+
+        self.gain = target if frames == len(self._ramp) else float(gains[-1, 0])
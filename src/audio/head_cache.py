@@ -0,0 +1,126 @@
+import threading
+from typing import Hashable, Union
+
+import numpy as np
+import soundfile as sf
+
+from audio.library import SoundLibrary
+from audio.pcm_cache import DecodedSound
+
+
+def decode_head(
+    sound_path: str,
+    pcm_path: Union[str, None],
+    library: SoundLibrary,
+    seconds: float,
+) -> DecodedSound:
+    """
+    Decode the first seconds of a sound into memory.
+
+    Library files are copied out of their memory map, so starting the sound never
+    waits on a page fault. Other files only have their first frames decoded.
+
+    :param sound_path: Path to the sound file.
+    :param pcm_path: Path of the library file, or None if not transcoded.
+    :param library: Library the sound was transcoded into.
+    :param seconds: Length of the head in seconds.
+    """
+
+    if pcm_path is not None:
+        try:
+            sound = library.load(pcm_path)
+            frames = round(seconds * sound.samplerate)
+            return DecodedSound(
+                np.array(sound.frames[:frames]), sound.samplerate, 0, sound.size
+            )
+        except (OSError, ValueError):
+            pass
+
+    with sf.SoundFile(sound_path) as sound_file:
+        frames = sound_file.read(
+            round(seconds * sound_file.samplerate), dtype="float32", always_2d=True
+        )
+        return DecodedSound(frames, sound_file.samplerate, 0, 0)
+
+
+class HeadCache:
+    """
+    Thread-safe store of the decoded heads of the sounds in the hot set.
+
+    A head lets a voice start instantly while the rest of the sound loads behind
+    it, at a fraction of the memory of keeping the whole sound decoded.
+    """
+
+    def __init__(self) -> None:
+        self._heads: dict[int, tuple[Hashable, DecodedSound]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sound_id: int) -> Union[DecodedSound, None]:
+        """
+        Get the head of a sound, if preloaded.
+
+        :param sound_id: ID of the sound.
+        """
+
+        with self._lock:
+            entry = self._heads.get(sound_id)
+
+        return entry[1] if entry is not None else None
+
+    def has(self, sound_id: int, key: Hashable) -> bool:
+        """
+        Check whether the head of a sound is preloaded from the given source.
+
+        :param sound_id: ID of the sound.
+        :param key: Source and length the head was decoded from.
+        """
+
+        with self._lock:
+            entry = self._heads.get(sound_id)
+
+        return entry is not None and entry[0] == key
+
+    def put(self, sound_id: int, key: Hashable, head: DecodedSound) -> None:
+        """
+        Store the head of a sound.
+
+        :param sound_id: ID of the sound.
+        :param key: Source and length the head was decoded from.
+        :param head: The decoded head.
+        """
+
+        with self._lock:
+            self._heads[sound_id] = (key, head)
+
+    def remove(self, sound_id: int) -> None:
+        """
+        Drop the head of a sound, if preloaded.
+
+        :param sound_id: ID of the sound.
+        """
+
+        with self._lock:
+            self._heads.pop(sound_id, None)
+
+    def retain(self, sound_ids: set[int]) -> None:
+        """
+        Drop the heads of every sound not in the given set.
+
+        :param sound_ids: IDs of the sounds to keep.
+        """
+
+        with self._lock:
+            for sound_id in list(self._heads):
+                if sound_id not in sound_ids:
+                    del self._heads[sound_id]
+
+    def stats(self) -> dict:
+        """
+        Get the number of preloaded heads and their memory usage.
+        """
+
+        with self._lock:
+            return {
+                "entries": len(self._heads),
+                "bytes": sum(head.nbytes for _, head in self._heads.values()),
+            }
@@ -0,0 +1,102 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union
+
+import numpy as np
+import soundfile as sf
+
+from audio.library import SoundLibrary
+
+
+def analyze_sound(
+    sound_path: str, library: Union[tuple[str, int, int], None] = None
+) -> dict:
+    """
+    Decode a sound file and compute its audio properties.
+    Runs in a worker process, so every error is returned instead of raised.
+
+    :param sound_path: Path to the sound file.
+    :param library: Directory, sample rate and channel count of the library to
+        store the decoded sound in, or None to skip the library.
+    """
+
+    try:
+        # Stat before decoding, so a file changed while being decoded is seen as
+        # changed by the next validity scan.
+        stat = os.stat(sound_path)
+        frames, samplerate = sf.read(sound_path, dtype="float32", always_2d=True)
+        if len(frames) == 0:
+            return {"error": f"Sound file has no audio: {sound_path}"}
+
+        metadata = {
+            "duration": len(frames) / samplerate,
+            "sample_rate": samplerate,
+            "channels": frames.shape[1],
+            "peak": float(np.max(np.abs(frames))),
+            "rms": float(np.sqrt(np.mean(np.square(frames, dtype=np.float64)))),
+            "source_mtime_ns": stat.st_mtime_ns,
+            "source_size": stat.st_size,
+        }
+
+        if library is not None:
+            metadata["pcm_path"] = SoundLibrary(*library).store(
+                sound_path, frames, samplerate
+            )
+
+        return metadata
+    except Exception as error:
+        return {"error": str(error)}
+
+
+class SoundImporter:
+    """
+    Runs sound analysis on a process pool, so decoding imported files never
+    competes with the event loop or the playback thread for the GIL.
+
+    Workers are spawned rather than forked on every platform, so they never
+    inherit the database, playback or logging threads of the server. A spawned
+    worker only imports this module and the library, neither of which has side
+    effects on import.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        """
+        Initialize the importer. Worker processes are started on first use.
+
+        :param max_workers: Maximum number of worker processes.
+        """
+
+        self._max_workers = max_workers
+        self._executor: Union[ProcessPoolExecutor, None] = None
+
+    async def analyze(
+        self, sound_path: str, library: Union[tuple[str, int, int], None] = None
+    ) -> dict:
+        """
+        Analyze a sound file in a worker process.
+
+        :param sound_path: Path to the sound file.
+        :param library: Directory, sample rate and channel count of the library to
+            store the decoded sound in, or None to skip the library.
+        """
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, analyze_sound, sound_path, library
+        )
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes, cancelling pending imports.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from audio.pcm_cache import DecodedSound
+
+
+class SoundLibrary:
+    """
+    Managed store of sounds transcoded once to raw float32 PCM at the engine's
+    sample rate and channel layout.
+
+    Library files are memory-mapped for playback, so reads are zero-copy and the
+    OS page cache keeps frequently played sounds in memory.
+    """
+
+    def __init__(self, directory: str, samplerate: int, channels: int) -> None:
+        """
+        Initialize the library.
+
+        :param directory: Directory holding the transcoded files.
+        :param samplerate: Sample rate sounds are transcoded to.
+        :param channels: Channel count sounds are transcoded to.
+        """
+
+        self._directory = Path(directory)
+        self._samplerate = samplerate
+        self._channels = channels
+
+        self._maps: dict[str, DecodedSound] = {}
+        self._lock = threading.Lock()
+
+    def store(self, sound_path: str, frames: np.ndarray, samplerate: int) -> str:
+        """
+        Store already decoded frames of a sound file in the library, returning the
+        path of the library file.
+
+        :param sound_path: Path to the sound file the frames were decoded from.
+        :param frames: Decoded frames shaped (frames, channels).
+        :param samplerate: Sample rate of the decoded frames.
+        """
+
+        pcm_path = self.__pcm_path(sound_path)
+        if pcm_path.is_file():
+            return str(pcm_path)
+
+        frames = self.__convert(frames, samplerate)
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = pcm_path.with_suffix(f".{os.getpid()}.tmp")
+        frames.tofile(temporary_path)
+        os.replace(temporary_path, pcm_path)
+
+        return str(pcm_path)
+
+    def __pcm_path(self, sound_path: str) -> Path:
+        stat = os.stat(sound_path)
+        key = f"{os.path.abspath(sound_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return self._directory / f"{digest}-{self._samplerate}-{self._channels}.f32"
+
+    def load(self, pcm_path: str) -> DecodedSound:
+        """
+        Memory-map a library file.
+
+        :param pcm_path: Path of the library file.
+        """
+
+        with self._lock:
+            sound = self._maps.get(pcm_path)
+            if sound is not None:
+                return sound
+
+        frames = np.memmap(pcm_path, dtype=np.float32, mode="r")
+        sound = DecodedSound(
+            frames.reshape(-1, self._channels), self._samplerate, 0, frames.nbytes
+        )
+
+        with self._lock:
+            self._maps[pcm_path] = sound
+
+        return sound
+
+    def remove(self, pcm_path: str) -> None:
+        """
+        Delete a library file. Files still mapped by a playing voice are left
+        behind, since they can not be deleted on Windows.
+
+        :param pcm_path: Path of the library file.
+        """
+
+        with self._lock:
+            self._maps.pop(pcm_path, None)
+
+        try:
+            os.remove(pcm_path)
+        except OSError:
+            pass
+
+    def __convert(self, frames: np.ndarray, samplerate: int) -> np.ndarray:
+        if frames.shape[1] != self._channels:
+            if frames.shape[1] != 1:
+                frames = frames.mean(axis=1, keepdims=True)
+            frames = np.repeat(frames, self._channels, axis=1)
+
+        if samplerate != self._samplerate and len(frames) > 1:
+            length = round(len(frames) * self._samplerate / samplerate)
+            points = np.arange(length) * (samplerate / self._samplerate)
+            positions = np.arange(len(frames))
+            frames = np.stack(
+                [np.interp(points, positions, channel) for channel in frames.T],
+                axis=1,
+            )
+
+        return np.ascontiguousarray(frames, dtype=np.float32)
@@ -0,0 +1,606 @@
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Union
+
+import numpy as np
+
+from audio.gain import GainRamp
+from audio.pcm_cache import DecodedSound
+from utils.errors import QueueFullError, VoiceLimitError
+from utils.metrics import TRIGGER_LATENCY
+
+STEAL_POLICIES = ("oldest", "quietest", "none")
+PLAY_POLICIES = ("mix", "preempt", "queue", "ignore-if-busy", "restart-same")
+# Seconds of the sound before and after the playback position a voice's level
+# is measured over.
+LEVEL_WINDOW = 0.05
+
+
+class RenderBuffers:
+    """
+    Scratch buffers shared by every voice of a mixer, so rendering a block does
+    not allocate any array. Every operation on them keeps matching dtypes and
+    shapes, since numpy buffers mixed-dtype and broadcasting ufuncs internally.
+    """
+
+    def __init__(self, frames: int, channels: int) -> None:
+        """
+        Initialize the buffers.
+
+        :param frames: Block size the buffers are sized for.
+        :param channels: Channel count of the mixer output.
+        """
+
+        self.frames = frames
+        self.offsets = np.arange(frames, dtype=np.float64)
+        self.points = np.empty(frames, dtype=np.float64)
+        self.floor = np.empty(frames, dtype=np.float64)
+        self.index = np.empty(frames, dtype=np.intp)
+        self.fraction = np.empty(frames, dtype=np.float32)
+        self.mono = np.empty(frames, dtype=np.float32)
+        self.output = np.empty((frames, channels), dtype=np.float32)
+        self._samples: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def samples(self, channels: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the three sample buffers used to render a voice with this channel count.
+
+        :param channels: Channel count of the voice.
+        """
+
+        buffers = self._samples.get(channels)
+        if buffers is None:
+            buffers = tuple(
+                np.empty((self.frames, channels), dtype=np.float32) for _ in range(3)
+            )
+            self._samples[channels] = buffers
+
+        return buffers
+
+
+class Voice:
+    """
+    A single playing instance of a sound inside the mixer.
+
+    Sounds whose sample rate differs from the output are resampled on the fly with
+    linear interpolation, so the output streams never need to be reopened.
+
+    A pending voice plays only the head of its sound until the rest is loaded and
+    passed to extend. If the head runs out first, the voice renders silence and
+    waits instead of finishing.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        sound_id: int,
+        sound: DecodedSound,
+        samplerate: int,
+        gain: float = 1.0,
+        on_end: Union[Callable[["Voice"], None], None] = None,
+    ) -> None:
+        """
+        Initialize the voice.
+
+        :param sound_id: ID of the sound being played.
+        :param sound: Decoded PCM of the sound.
+        :param samplerate: Sample rate of the output the voice is rendered into.
+        :param gain: Gain applied to this voice only.
+        :param on_end: Callback invoked once the voice is removed from the mixer.
+        """
+
+        self.id = next(Voice._ids)
+        self.sound_id = sound_id
+        self.sound = sound
+        self.gain = gain
+        self.on_end = on_end
+
+        self.position = 0.0
+        self.pending = False
+        self.priority = 0
+        self.queued = False
+        self.on_start: Union[Callable[["Voice"], None], None] = None
+        self.triggered_at: Union[float, None] = None
+        self.expected_duration: Union[float, None] = None
+        self._step = sound.samplerate / samplerate
+        self._stop: Union[float, None] = None
+        self._end = 0
+        self._gain_ramp: Union[GainRamp, None] = None
+
+        self.__update_end()
+
+    def seek(self, seconds: float) -> None:
+        """
+        Move the playback position. Positions past the end finish the voice.
+
+        :param seconds: Position in seconds from the start of the sound.
+        """
+
+        self.position = max(seconds, 0.0) * self.sound.samplerate
+        if not self.pending:
+            self.position = min(self.position, self._end)
+
+    def trim(self, seconds: Union[float, None]) -> None:
+        """
+        Stop the voice at a position instead of the end of the sound.
+
+        :param seconds: Position in seconds to stop at, or None for the end.
+        """
+
+        self._stop = seconds
+        self.__update_end()
+
+    def extend(self, sound: DecodedSound) -> None:
+        """
+        Replace the head of a pending voice with the whole sound.
+
+        :param sound: Decoded PCM of the whole sound, at the head's sample rate.
+        """
+
+        self.sound = sound
+        self.pending = False
+        self.__update_end()
+
+    def __update_end(self) -> None:
+        frames = len(self.sound.frames)
+        if self._stop is not None:
+            frames = min(frames, round(self._stop * self.sound.samplerate))
+
+        self._end = max(0, frames - (0 if self._step == 1 else 1))
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending and self.position >= self._end
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Playback position in seconds.
+        """
+
+        return self.position / self.sound.samplerate
+
+    @property
+    def duration(self) -> float:
+        """
+        Length of the sound in seconds. While only the head is loaded, the
+        expected length of the whole sound, when known.
+        """
+
+        if self.pending and self.expected_duration is not None:
+            return self.expected_duration
+
+        return len(self.sound.frames) / self.sound.samplerate
+
+    @property
+    def level(self) -> float:
+        """
+        Peak level the voice outputs around its playback position: the peak of
+        the sound just before and after the position, times the gain the voice is
+        rendered at, as reached by a gain ramp in progress.
+        """
+
+        window = round(LEVEL_WINDOW * self.sound.samplerate)
+        position = int(self.position)
+        frames = self.sound.frames[max(0, position - window) : position + window]
+        if len(frames) == 0:
+            return 0.0
+
+        gain = self.gain if self._gain_ramp is None else self._gain_ramp.gain
+        return abs(gain) * max(float(frames.max()), -float(frames.min()))
+
+    def render(self, out: np.ndarray, buffers: RenderBuffers) -> int:
+        """
+        Add the next block of this voice to the output buffer, returning the
+        number of frames rendered.
+
+        :param out: Output buffer shaped (frames, channels).
+        :param buffers: Scratch buffers to render into.
+        """
+
+        samples, following, fraction = buffers.samples(self.sound.channels)
+
+        if self._step == 1:
+            start = int(self.position)
+            chunk = self.sound.frames[start : min(start + len(out), self._end)]
+            frames = len(chunk)
+            samples = samples[:frames]
+            np.copyto(samples, chunk)
+        else:
+            frames = min(len(out), math.ceil((self._end - self.position) / self._step))
+            if frames <= 0:
+                if not self.pending:
+                    self.position = self._end
+                return 0
+
+            samples = samples[:frames]
+            self.__interpolate(samples, following[:frames], fraction[:frames], buffers)
+
+        self.position += frames * self._step
+
+        if self._gain_ramp is None:
+            self._gain_ramp = GainRamp(buffers.frames, self.sound.channels, self.gain)
+        self._gain_ramp.apply(samples, self.gain)
+
+        if samples.shape[1] == out.shape[1]:
+            out[:frames] += samples
+            return frames
+
+        if samples.shape[1] == 1:
+            mono = samples[:, 0]
+        else:
+            mono = buffers.mono[:frames]
+            np.copyto(mono, samples[:, 0])
+            for channel in range(1, samples.shape[1]):
+                mono += samples[:, channel]
+            mono *= 1 / samples.shape[1]
+
+        output = buffers.output[:frames]
+        np.copyto(output, mono[:, None])
+        out[:frames] += output
+
+        return frames
+
+    def __interpolate(
+        self,
+        samples: np.ndarray,
+        following: np.ndarray,
+        fraction: np.ndarray,
+        buffers: RenderBuffers,
+    ) -> None:
+        frames = len(samples)
+
+        points = buffers.points[:frames]
+        np.multiply(buffers.offsets[:frames], self._step, out=points)
+        points += self.position
+
+        floor = buffers.floor[:frames]
+        np.floor(points, out=floor)
+        index = buffers.index[:frames]
+        np.copyto(index, floor, casting="unsafe")
+
+        points -= floor
+        np.copyto(buffers.fraction[:frames], points, casting="same_kind")
+        np.copyto(fraction, buffers.fraction[:frames, None])
+
+        np.take(self.sound.frames, index, axis=0, out=samples, mode="clip")
+        index += 1
+        np.take(self.sound.frames, index, axis=0, out=following, mode="clip")
+
+        following -= samples
+        following *= fraction
+        samples += following
+
+
+class Mixer:
+    """
+    Mixes every active voice into a single output buffer per block.
+
+    When the voice limit is reached, the steal policy decides which voice makes
+    room for the new one: the oldest, the quietest by the level it currently
+    outputs, or none (the new voice is rejected).
+
+    The mixer also schedules voices. A play policy decides what a new voice does
+    when others are playing: mix with them, preempt the ones it outranks, wait in
+    the queue, be ignored, or restart voices of the same sound. Queued voices are
+    ordered by priority and start in the same block the last playing voice ends
+    in, right after its final frame.
+
+    Commands posted to the mixer run on the rendering thread before the next
+    block, so the event loop never waits on the mixer lock while a block renders.
+    Voices and the queue can be read at any time without the lock.
+    """
+
+    def __init__(
+        self, channels: int, max_voices: int, steal_policy: str, max_queued: int = 32
+    ) -> None:
+        """
+        Initialize the mixer.
+
+        :param channels: Channel count of the rendered output.
+        :param max_voices: Maximum number of voices playing at once.
+        :param steal_policy: One of "oldest", "quietest" or "none".
+        :param max_queued: Maximum number of voices waiting in the queue.
+        """
+
+        if steal_policy not in STEAL_POLICIES:
+            raise ValueError(f"Steal policy must be one of {STEAL_POLICIES}")
+
+        self.channels = channels
+        self.max_voices = max_voices
+        self.steal_policy = steal_policy
+        self.max_queued = max_queued
+
+        self._voices: list[Voice] = []
+        self._queue: list[Voice] = []
+        self._buffers: Union[RenderBuffers, None] = None
+        self._commands: deque[tuple[Callable, Callable]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def voices(self) -> list[Voice]:
+        # Copying a list is atomic under the GIL, so a snapshot does not need the
+        # lock held by the rendering thread for a whole block.
+        return list(self._voices)
+
+    @property
+    def queued(self) -> list[Voice]:
+        """
+        The voices waiting in the queue, in the order they will start.
+        """
+
+        return list(self._queue)
+
+    def post(
+        self,
+        command: Callable[[], Any],
+        done: Callable[[Any, Union[Exception, None]], None],
+    ) -> None:
+        """
+        Queue a command to run on the rendering thread before the next block.
+
+        :param command: The command to run, usually a bound mixer method.
+        :param done: Called with the result of the command, or with the exception
+            it raised, from the thread that ran it.
+        """
+
+        self._commands.append((command, done))
+
+    def run_commands(self) -> None:
+        """
+        Run the posted commands, in the order they were posted. Called before
+        every block, and by the owner of the mixer once nothing renders anymore.
+        """
+
+        while self._commands:
+            command, done = self._commands.popleft()
+            try:
+                result = command()
+            except Exception as error:
+                done(None, error)
+                continue
+
+            done(result, None)
+
+    def add(self, voice: Voice) -> list[Voice]:
+        """
+        Add a voice to the mix.
+
+        Returns the voices stolen to make room for it.
+
+        :param voice: The voice to add.
+        """
+
+        with self._lock:
+            stolen = self.__add(voice)
+
+        self.__end(stolen)
+        self.__start(voice)
+        return stolen
+
+    def play(self, voice: Voice, policy: str = "mix") -> tuple[str, list[Voice]]:
+        """
+        Schedule a voice according to a play policy.
+
+        Returns what happened to the voice, one of "playing", "queued", "ignored"
+        or "restarted", along with the voices it stopped or restarted.
+
+        :param voice: The voice to schedule.
+        :param policy: One of the play policies.
+        """
+
+        if policy not in PLAY_POLICIES:
+            raise ValueError(f"Play policy must be one of {PLAY_POLICIES}")
+
+        with self._lock:
+            busy = bool(self._voices or self._queue)
+
+            if policy == "restart-same":
+                same = [v for v in self._voices if v.sound_id == voice.sound_id]
+                if same:
+                    for other in same:
+                        other.seek(voice.elapsed)
+                    return "restarted", same
+
+            if policy == "ignore-if-busy" and busy:
+                return "ignored", []
+
+            if policy == "queue" and busy:
+                if len(self._queue) >= self.max_queued:
+                    raise QueueFullError(self.max_queued)
+
+                index = next(
+                    (
+                        index
+                        for index, other in enumerate(self._queue)
+                        if other.priority < voice.priority
+                    ),
+                    len(self._queue),
+                )
+                voice.queued = True
+                self._queue.insert(index, voice)
+                return "queued", []
+
+            stopped = []
+            if policy == "preempt":
+                if any(other.priority > voice.priority for other in self._voices):
+                    return "ignored", []
+
+                stopped, self._voices = self._voices, []
+
+            stopped += self.__add(voice)
+
+        # The start callback runs before any block is rendered, so a voice that
+        # ends within its first block still reports its start first.
+        self.__end(stopped)
+        self.__start(voice)
+        return "playing", stopped
+
+    def dequeue(
+        self,
+        voice_id: Union[int, None] = None,
+        sound_id: Union[int, None] = None,
+    ) -> list[Voice]:
+        """
+        Remove voices from the queue. Without filters, the queue is cleared.
+
+        :param voice_id: Only remove the voice with this ID.
+        :param sound_id: Only remove voices of this sound.
+        """
+
+        with self._lock:
+            removed = self.__match(self._queue, voice_id, sound_id)
+            self._queue = [voice for voice in self._queue if voice not in removed]
+
+        return removed
+
+    def remove(
+        self,
+        voice_id: Union[int, None] = None,
+        sound_id: Union[int, None] = None,
+    ) -> list[Voice]:
+        """
+        Remove voices from the mix. Without filters, every voice is removed.
+
+        :param voice_id: Only remove the voice with this ID.
+        :param sound_id: Only remove voices playing this sound.
+        """
+
+        with self._lock:
+            removed = self.__match(self._voices, voice_id, sound_id)
+            self._voices = [voice for voice in self._voices if voice not in removed]
+
+        self.__end(removed)
+        return removed
+
+    def seek(
+        self,
+        seconds: float,
+        voice_id: Union[int, None] = None,
+        sound_id: Union[int, None] = None,
+    ) -> list[Voice]:
+        """
+        Move the playback position of voices. Without filters, every voice is
+        moved. Returns the moved voices.
+
+        :param seconds: Position in seconds from the start of the sound.
+        :param voice_id: Only move the voice with this ID.
+        :param sound_id: Only move voices playing this sound.
+        """
+
+        with self._lock:
+            voices = self.__match(self._voices, voice_id, sound_id)
+            for voice in voices:
+                voice.seek(seconds)
+
+        return voices
+
+    def extend(self, voice: Voice, sound: DecodedSound) -> None:
+        """
+        Replace the head of a pending voice with the whole sound, between two
+        rendered blocks.
+
+        :param voice: The pending voice.
+        :param sound: Decoded PCM of the whole sound.
+        """
+
+        with self._lock:
+            voice.extend(sound)
+
+    def render(self, out: np.ndarray, queued: float = 0.0) -> None:
+        """
+        Run the posted commands, then render the next block of every active voice
+        into the output buffer. Once no voice is left playing, queued voices start
+        right after the last rendered frame.
+
+        :param out: Output buffer shaped (frames, channels), overwritten in place.
+        :param queued: Seconds of audio already waiting in the output ahead of this
+            block, counted in the trigger latency of the voices it starts.
+        """
+
+        self.run_commands()
+
+        if self._buffers is None or self._buffers.frames < len(out):
+            self._buffers = RenderBuffers(len(out), self.channels)
+
+        out.fill(0)
+        finished = []
+        started = []
+        with self._lock:
+            offset = 0
+            for voice in self._voices:
+                frames = voice.render(out, self._buffers)
+                if voice.triggered_at is not None:
+                    TRIGGER_LATENCY.observe(
+                        time.perf_counter() - voice.triggered_at + queued
+                    )
+                    voice.triggered_at = None
+                if voice.finished:
+                    finished.append(voice)
+                    offset = max(offset, frames)
+
+            if finished:
+                self._voices = [v for v in self._voices if not v.finished]
+
+            while not self._voices and self._queue and offset < len(out):
+                voice = self._queue.pop(0)
+                voice.triggered_at = None
+                started.append(voice)
+
+                frames = voice.render(out[offset:], self._buffers)
+                if voice.finished:
+                    offset += frames
+                else:
+                    self._voices.append(voice)
+
+        # Callbacks run in the order the voices started and ended in the block,
+        # so clients never see a queued voice start before the previous one ends.
+        self.__end(finished)
+
+        for voice in started:
+            self.__start(voice)
+            if voice.finished:
+                self.__end([voice])
+
+    def __add(self, voice: Voice) -> list[Voice]:
+        stolen = []
+        while len(self._voices) >= self.max_voices:
+            if self.steal_policy == "none":
+                raise VoiceLimitError(self.max_voices)
+
+            if self.steal_policy == "quietest":
+                victim = min(self._voices, key=lambda v: v.level)
+            else:
+                victim = self._voices[0]
+
+            self._voices.remove(victim)
+            stolen.append(victim)
+
+        self._voices.append(voice)
+        return stolen
+
+    def __match(
+        self,
+        voices: list[Voice],
+        voice_id: Union[int, None],
+        sound_id: Union[int, None],
+    ) -> list[Voice]:
+        return [
+            voice
+            for voice in voices
+            if (voice_id is None or voice.id == voice_id)
+            and (sound_id is None or voice.sound_id == sound_id)
+        ]
+
+    def __start(self, voice: Voice) -> None:
+        if voice.on_start is not None:
+            voice.on_start(voice)
+
+    def __end(self, voices: list[Voice]) -> None:
+        for voice in voices:
+            if voice.on_end is not None:
+                voice.on_end(voice)
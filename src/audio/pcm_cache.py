@@ -0,0 +1,123 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import soundfile as sf
+
+
+class DecodedSound(NamedTuple):
+    """
+    Decoded float32 PCM of a sound file, shaped (frames, channels).
+    """
+
+    frames: np.ndarray
+    samplerate: int
+    mtime_ns: int
+    size: int
+
+    @property
+    def channels(self) -> int:
+        return self.frames.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.frames.nbytes
+
+
+class PCMCache:
+    """
+    Thread-safe LRU cache of decoded sound files.
+
+    Entries are keyed by path and are only reused while the file's mtime and size
+    are unchanged. Least recently used entries are evicted once the decoded data
+    exceeds the memory budget.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Initialize the cache.
+
+        :param max_bytes: Memory budget for decoded PCM data, in bytes.
+        """
+
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, DecodedSound] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> DecodedSound:
+        """
+        Get the decoded PCM of a sound file, decoding it on a cache miss.
+
+        :param path: Path to the sound file.
+        """
+
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if (
+                entry is not None
+                and entry.mtime_ns == stat.st_mtime_ns
+                and entry.size == stat.st_size
+            ):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+
+            self.misses += 1
+
+        frames, samplerate = sf.read(path, dtype="float32", always_2d=True)
+        frames.flags.writeable = False
+        entry = DecodedSound(frames, samplerate, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            self.__remove(path)
+            if entry.nbytes <= self._max_bytes:
+                self._entries[path] = entry
+                self._size += entry.nbytes
+                self.__evict()
+
+        return entry
+
+    def invalidate(self, path: str) -> None:
+        """
+        Drop the cached PCM of a sound file, if any.
+
+        :param path: Path to the sound file.
+        """
+
+        with self._lock:
+            self.__remove(path)
+
+    def stats(self) -> dict:
+        """
+        Get the cache counters and current memory usage.
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self._max_bytes,
+            }
+
+    def __remove(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry.nbytes
+
+    def __evict(self) -> None:
+        while self._size > self._max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.nbytes
+            self.evictions += 1
@@ -0,0 +1,198 @@
+import threading
+import time
+from typing import Callable, Union
+
+import numpy as np
+import sounddevice as sd
+
+from audio.backends import OutputBackend
+from audio.devices import DeviceResolver
+from audio.gain import GainRamp
+from audio.mixer import Mixer
+from audio.ring_buffer import RingBuffer
+from audio.stream_pool import StreamFormat, StreamPool
+from global_config import config
+from utils.metrics import (
+    BLOCK_RENDER,
+    BUFFER_UNDERRUNS,
+    DEVICE_OPEN,
+    OUTPUT_OVERFLOWS,
+    OUTPUT_UNDERFLOWS,
+)
+
+# Seconds without a stream callback after which a callback stream is considered
+# lost, since some host APIs stop calling back on unplug without stopping it.
+CALLBACK_TIMEOUT = 1.0
+
+
+class PortAudioBackend(OutputBackend):
+    """
+    Plays the mix on two PortAudio output streams: the default device for the
+    headphones and the configured device for the microphone.
+
+    In callback mode the playback thread only fills ring buffers that the stream
+    callbacks drain. The rings hold only a couple of blocks, since every frame
+    queued in them delays a new voice. Output streams stay open at the configured
+    sample rate and channel layout across plays.
+    """
+
+    name = "portaudio"
+
+    def __init__(self) -> None:
+        super().__init__(realtime=True)
+
+        self._device_resolver = DeviceResolver()
+        self._stream_pool = StreamPool()
+        self._headphone_stream: Union[sd.OutputStream, None] = None
+        self._microphone_stream: Union[sd.OutputStream, None] = None
+        self._headphone_ring = RingBuffer(
+            config.chunk_size * config.ring_buffer_blocks, config.channels
+        )
+        self._microphone_ring = RingBuffer(
+            config.chunk_size * config.ring_buffer_blocks, config.channels
+        )
+        self._callback_at = time.monotonic()
+
+    @property
+    def device(self) -> Union[dict, None]:
+        return self._device_resolver.device
+
+    @property
+    def active(self) -> bool:
+        streams = (self._headphone_stream, self._microphone_stream)
+        if any(stream is None or not stream.active for stream in streams):
+            return False
+
+        return (
+            config.playback_mode != "callback"
+            or time.monotonic() - self._callback_at < CALLBACK_TIMEOUT
+        )
+
+    def open(self) -> None:
+        started = time.perf_counter()
+        device_id = self._device_resolver.resolve(
+            config.device_name_match, config.device_host_api
+        )
+
+        callback = config.playback_mode == "callback"
+        stream_format = StreamFormat(
+            config.samplerate, config.channels, config.chunk_size
+        )
+
+        self._headphone_stream = self._stream_pool.get(
+            "headphone",
+            None,
+            stream_format,
+            self.__stream_callback(self._headphone_ring, self.__headphone_volume)
+            if callback
+            else None,
+        )
+        self._microphone_stream = self._stream_pool.get(
+            "microphone",
+            device_id,
+            stream_format,
+            self.__stream_callback(
+                self._microphone_ring, lambda: config.microphone_volume
+            )
+            if callback
+            else None,
+        )
+        self._callback_at = time.monotonic()
+        DEVICE_OPEN.observe(time.perf_counter() - started)
+
+    def close(self) -> None:
+        self._stream_pool.close()
+
+    def reinitialize(self) -> None:
+        self._stream_pool.close()
+        self._device_resolver.reinitialize()
+
+    def run(
+        self,
+        mixer: Mixer,
+        stop_event: threading.Event,
+        frames: Union[int, None] = None,
+    ) -> int:
+        if config.playback_mode == "callback":
+            return self.__run_callback(mixer, stop_event)
+
+        return self.__run_blocking(mixer, stop_event)
+
+    def __run_blocking(self, mixer: Mixer, stop_event: threading.Event) -> int:
+        mix = np.zeros((config.chunk_size, config.channels), dtype="float32")
+        headphone = np.empty_like(mix)
+        microphone = np.empty_like(mix)
+        headphone_gain = GainRamp(
+            config.chunk_size, config.channels, self.__headphone_volume()
+        )
+        microphone_gain = GainRamp(
+            config.chunk_size, config.channels, config.microphone_volume
+        )
+
+        rendered = 0
+        while not stop_event.is_set():
+            started = time.perf_counter()
+            mixer.render(mix)
+            BLOCK_RENDER.observe(time.perf_counter() - started)
+
+            np.copyto(headphone, mix)
+            headphone_gain.apply(headphone, self.__headphone_volume())
+            np.copyto(microphone, mix)
+            microphone_gain.apply(microphone, config.microphone_volume)
+
+            self._headphone_stream.write(headphone)
+            self._microphone_stream.write(microphone)
+            rendered += len(mix)
+
+        return rendered
+
+    def __run_callback(self, mixer: Mixer, stop_event: threading.Event) -> int:
+        """
+        Render the mix into ring buffers drained by the PortAudio stream callbacks,
+        so audio delivery does not depend on when this thread gets scheduled.
+        """
+
+        mix = np.zeros((config.chunk_size, config.channels), dtype="float32")
+        block_duration = config.chunk_size / config.samplerate
+
+        rendered = 0
+        while not stop_event.is_set():
+            free = min(self._headphone_ring.free, self._microphone_ring.free)
+            if free < config.chunk_size:
+                mixer.run_commands()
+                time.sleep(block_duration / 4)
+                continue
+
+            queued = self._headphone_ring.available / config.samplerate
+            started = time.perf_counter()
+            mixer.render(mix, queued)
+            BLOCK_RENDER.observe(time.perf_counter() - started)
+            self._headphone_ring.write(mix)
+            self._microphone_ring.write(mix)
+            rendered += len(mix)
+
+        return rendered
+
+    def __stream_callback(
+        self, ring: RingBuffer, volume: Callable[[], float]
+    ) -> Callable:
+        gain = GainRamp(config.chunk_size, config.channels, volume())
+
+        def callback(
+            outdata: np.ndarray, frames: int, _, status: sd.CallbackFlags
+        ) -> None:
+            self._callback_at = time.monotonic()
+            if status.output_underflow:
+                OUTPUT_UNDERFLOWS.increment()
+            if status.output_overflow:
+                OUTPUT_OVERFLOWS.increment()
+
+            if ring.read(outdata) < frames:
+                BUFFER_UNDERRUNS.increment()
+
+            gain.apply(outdata, volume())
+
+        return callback
+
+    def __headphone_volume(self) -> float:
+        return config.headphone_volume if not config.headphone_muted else 0
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated single-producer, single-consumer ring buffer of float32 frames.
+
+    The producer only ever advances the write counter and the consumer only the
+    read counter, and each counter is published after its copy completes, so
+    neither side needs a lock. This keeps the audio callback from ever waiting
+    on the producer thread.
+    """
+
+    def __init__(self, frames: int, channels: int) -> None:
+        """
+        Initialize the ring buffer.
+
+        :param frames: Capacity of the buffer, in frames.
+        :param channels: Channel count of each frame.
+        """
+
+        self._buffer = np.zeros((frames, channels), dtype="float32")
+        self._capacity = frames
+        self._read = 0
+        self._write = 0
+
+    @property
+    def available(self) -> int:
+        """
+        Number of frames ready to be read.
+        """
+
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        """
+        Number of frames that can be written without overwriting unread data.
+        """
+
+        return self._capacity - (self._write - self._read)
+
+    def write(self, data: np.ndarray) -> int:
+        """
+        Copy frames into the buffer. Returns the number of frames written.
+
+        :param data: Frames shaped (frames, channels).
+        """
+
+        frames = min(len(data), self.free)
+        start = self._write % self._capacity
+        first = min(frames, self._capacity - start)
+
+        self._buffer[start : start + first] = data[:first]
+        self._buffer[: frames - first] = data[first:frames]
+
+        self._write += frames
+        return frames
+
+    def read(self, out: np.ndarray) -> int:
+        """
+        Copy frames out of the buffer, zero-filling whatever is not available.
+        Returns the number of frames read.
+
+        :param out: Buffer shaped (frames, channels) to copy into.
+        """
+
+        frames = min(len(out), self.available)
+        start = self._read % self._capacity
+        first = min(frames, self._capacity - start)
+
+        out[:first] = self._buffer[start : start + first]
+        out[first:frames] = self._buffer[: frames - first]
+        out[frames:] = 0
+
+        self._read += frames
+        return frames
@@ -0,0 +1,75 @@
+from typing import Callable, NamedTuple, Union
+
+import sounddevice as sd
+
+
+class StreamFormat(NamedTuple):
+    """
+    Sample rate, channel layout and block size of an output stream.
+    """
+
+    samplerate: int
+    channels: int
+    blocksize: int
+
+
+class StreamPool:
+    """
+    Keeps named output streams open across plays.
+
+    A stream is only closed and reopened when its device or format changes,
+    so playing a sound never pays for opening a PortAudio stream.
+    """
+
+    def __init__(self) -> None:
+        self._streams: dict[str, tuple[tuple, sd.OutputStream]] = {}
+
+    def get(
+        self,
+        name: str,
+        device: Union[int, None],
+        stream_format: StreamFormat,
+        callback: Union[Callable, None] = None,
+    ) -> sd.OutputStream:
+        """
+        Get a started output stream, opening it only if the requested device or
+        format differs from the one already open under this name.
+
+        :param name: Name of the stream slot.
+        :param device: Device index, or None for the default output device.
+        :param stream_format: Sample rate, channels and block size of the stream.
+        :param callback: Stream callback, or None for a blocking stream.
+        """
+
+        spec = (device, stream_format, callback is not None)
+
+        current = self._streams.get(name)
+        if current is not None:
+            current_spec, stream = current
+            if current_spec == spec and stream.active:
+                return stream
+
+            stream.close()
+
+        stream = sd.OutputStream(
+            device=device,
+            blocksize=stream_format.blocksize,
+            samplerate=stream_format.samplerate,
+            channels=stream_format.channels,
+            dtype="float32",
+            callback=callback,
+        )
+        stream.start()
+
+        self._streams[name] = (spec, stream)
+        return stream
+
+    def close(self) -> None:
+        """
+        Close every open stream.
+        """
+
+        for _, stream in self._streams.values():
+            stream.close()
+
+        self._streams.clear()
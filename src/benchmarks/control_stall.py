@@ -0,0 +1,185 @@
+"""
+Event-loop stall caused by controlling playback.
+
+Starts the sound controller on the null backend, which renders in real time on
+the playback thread, and keeps a few voices playing. Then sends SOUND:PLAY and
+SOUND:STOP through their handlers, and records how long each step of every
+handler call runs on the event loop before it returns or suspends. The worst of
+those steps is the longest the loop stalls because of a call.
+
+A step that blocks the loop thread, on a join, a sleep, a lock or I/O, is timed
+in wall time. Other steps are timed in CPU time of the loop thread, since on a
+busy machine or virtual host the thread is also preempted in the middle of steps
+that never wait on anything. Where the platform can not tell whether a thread
+blocked, every step is timed in wall time. The wall time of the steps and the
+ticker lag of the loop are reported alongside but not checked.
+
+Exits with a non-zero status when a handler call stalls the loop for longer
+than the SLO. Run from the src directory with: python -m benchmarks.control_stall
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+from typing import Any, Coroutine
+
+import numpy as np
+import soundfile as sf
+
+try:
+    from resource import RUSAGE_THREAD, getrusage
+except ImportError:
+    RUSAGE_THREAD = None
+
+from benchmarks.db_stall import measure_stall
+
+
+def blocking_switches() -> int:
+    """
+    Number of times the calling thread blocked, or -1 when it can not be told.
+    """
+
+    if RUSAGE_THREAD is None:
+        return -1
+
+    return getrusage(RUSAGE_THREAD).ru_nvcsw
+
+
+@types.coroutine
+def timed_steps(coroutine: Coroutine, steps: list[tuple[float, float]]) -> Any:
+    """
+    Run a coroutine, recording the stall and the wall time of each of its steps
+    on the event loop.
+    """
+
+    value, error = None, None
+    while True:
+        switches = blocking_switches()
+        started = (time.thread_time(), time.perf_counter())
+        try:
+            if error is None:
+                future = coroutine.send(value)
+            else:
+                future = coroutine.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            cpu = time.thread_time() - started[0]
+            wall = time.perf_counter() - started[1]
+            blocked = switches < 0 or blocking_switches() != switches
+            steps.append((wall if blocked else cpu, wall))
+
+        value, error = None, None
+        try:
+            value = yield future
+        except BaseException as exception:
+            error = exception
+
+
+def summarize(steps: list[tuple[float, float]]) -> dict:
+    stalls = sorted(step[0] for step in steps)
+    return {
+        "steps": len(steps),
+        "max_call_ms": round(stalls[-1] * 1000, 3),
+        "p99_call_ms": round(stalls[int(len(stalls) * 0.99)] * 1000, 3),
+        "max_wall_ms": round(max(step[1] for step in steps) * 1000, 3),
+    }
+
+
+async def create_sound(directory: str, name: str, seconds: float) -> dict:
+    from handlers.sound_handler import import_sound, sound_service
+
+    path = os.path.join(directory, f"{name}.wav")
+    rng = np.random.default_rng(len(name))
+    sf.write(path, rng.uniform(-0.5, 0.5, (int(44100 * seconds), 2)), 44100)
+
+    sound = await sound_service.create({"name": name, "path": path})
+    await import_sound(sound)
+    return sound
+
+
+async def run(directory: str, voices: int, plays: int) -> dict:
+    """
+    Play and stop a sound through the handlers while other voices play.
+
+    :param directory: Directory to write the sound files to.
+    :param voices: Number of voices kept playing in the background.
+    :param plays: Number of SOUND:PLAY and SOUND:STOP pairs to send.
+    """
+
+    from handlers.sound_handler import (
+        handle_sound_play,
+        handle_sound_stop,
+        sound_importer,
+    )
+    from sound_controller import sound_controller
+
+    background = [
+        await create_sound(directory, f"background-{index}", 60.0)
+        for index in range(voices)
+    ]
+    sound = await create_sound(directory, "control", 2.0)
+    play_steps = []
+    stop_steps = []
+
+    async def control() -> None:
+        for _ in range(plays):
+            event = {"soundId": sound["id"]}
+            await timed_steps(handle_sound_play(None, event), play_steps)
+            await asyncio.sleep(0.001)
+            await timed_steps(handle_sound_stop(None, event), stop_steps)
+            await asyncio.sleep(0.001)
+
+    await sound_controller.start()
+    try:
+        for other in background:
+            await handle_sound_play(None, {"soundId": other["id"], "policy": "mix"})
+
+        # The first play decodes the sound, which only happens once.
+        await handle_sound_play(None, {"soundId": sound["id"]})
+        await handle_sound_stop(None, {"soundId": sound["id"]})
+
+        loop_stall = await measure_stall(control)
+    finally:
+        sound_controller.close()
+        sound_importer.shutdown()
+
+    play = summarize(play_steps)
+    stop = summarize(stop_steps)
+    return {
+        "voices": voices,
+        "plays": plays,
+        "sound_play": play,
+        "sound_stop": stop,
+        "max_call_ms": max(play["max_call_ms"], stop["max_call_ms"]),
+        "loop": loop_stall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--voices", type=int, default=6)
+    parser.add_argument("--plays", type=int, default=200)
+    parser.add_argument("--slo-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # The config and sounds are read from a database in the working directory.
+    directory = tempfile.mkdtemp(prefix="zound-bench-")
+    os.chdir(directory)
+    os.environ.setdefault("ZOUND_AUDIO_BACKEND", "null")
+
+    results = asyncio.run(run(directory, args.voices, args.plays))
+    results["slo_ms"] = args.slo_ms
+    print(json.dumps(results, indent=2))
+
+    if results["max_call_ms"] > args.slo_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Event-loop stall caused by database writes.
+
+Compares running repository writes inline on the event loop, as handlers did
+before, with awaiting them on the database thread through the services.
+Run from the src directory with: python -m benchmarks.db_stall
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+async def measure_stall(workload, interval: float = 0.001) -> dict:
+    """
+    Run a workload while a ticker task records how late each of its wake-ups is.
+    """
+
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(interval * 5)
+
+    started = time.perf_counter()
+    await workload()
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await task
+
+    lags.sort()
+    return {
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "max_stall_ms": round(lags[-1] * 1000, 3),
+        "p99_stall_ms": round(lags[int(len(lags) * 0.99)] * 1000, 3),
+    }
+
+
+async def run(writes: int) -> dict:
+    from database.repositories.sound import SoundRepository
+    from database.services.sound import SoundService
+
+    repository = SoundRepository()
+    service = SoundService()
+
+    sound = await service.create({"name": "bench", "path": "bench.wav"})
+
+    async def inline() -> None:
+        for index in range(writes):
+            repository.set_is_valid(sound["id"], index % 2 == 0)
+            await asyncio.sleep(0)
+
+    async def offloaded() -> None:
+        for index in range(writes):
+            await service.set_is_valid(sound["id"], index % 2 == 0)
+
+    return {
+        "writes": writes,
+        "inline_on_loop": await measure_stall(inline),
+        "database_thread": await measure_stall(offloaded),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=500)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="zound-bench-"))
+    print(json.dumps(asyncio.run(run(args.writes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Headless load test of the websocket server.
+
+Starts the server with the null audio backend in a scratch directory, adds a set
+of generated sounds, then drives concurrent clients at a target event rate with
+a weighted mix of SOUND:FETCH, SOUND:PLAY, SOUND:STOP and CONFIG:UPDATE events.
+Events are sent on a fixed schedule whether or not earlier ones were handled, so
+a slow server shows up as latency instead of as a lower send rate.
+
+Reports response latency percentiles per event type, throughput, and the event
+loop lag of both the server and the load generator as JSON.
+Run from the src directory with: python -m benchmarks.load_test
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.db_stall import measure_stall
+from utils.events import IncomingEvent, OutgoingEvent
+from websocket_client import ZoundClient
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for entry in mix.split(","):
+        name, _, weight = entry.partition("=")
+        if name not in ("fetch", "play", "stop", "config"):
+            raise ValueError(f"Unknown event in mix: {name}")
+        weights[name] = float(weight or 1)
+
+    return weights
+
+
+def build_event(name: str, sound_ids: list[int], rng: random.Random) -> dict:
+    if name == "fetch":
+        return {"type": IncomingEvent.SOUND_FETCH}
+    if name == "play":
+        return {"type": IncomingEvent.SOUND_PLAY, "soundId": rng.choice(sound_ids)}
+    if name == "stop":
+        return {"type": IncomingEvent.SOUND_STOP}
+
+    volume = round(rng.uniform(0.1, 1.0), 2)
+    return {
+        "type": IncomingEvent.CONFIG_UPDATE,
+        "config": {
+            "headphone_volume": volume,
+            "microphone_volume": volume,
+            "headphone_muted": False,
+        },
+    }
+
+
+def write_sounds(directory: str, count: int, seconds: float) -> list[dict]:
+    sounds = []
+    for index in range(count):
+        path = os.path.join(directory, f"sound-{index}.wav")
+        times = np.arange(int(48000 * seconds)) / 48000
+        tone = 0.2 * np.sin(2 * np.pi * (220 + 20 * index) * times)
+        sf.write(path, np.stack([tone, tone], axis=1).astype(np.float32), 48000)
+        sounds.append({"name": f"sound-{index}", "path": path})
+
+    return sounds
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(samples[int(len(samples) * 0.5)] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99)] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def histogram_delta(before: dict, after: dict) -> dict:
+    """
+    Summarize the observations a server histogram gained between two snapshots.
+    Percentiles are bucket upper bounds.
+    """
+
+    previous = dict(before.get("", {}).get("buckets", []))
+    buckets = [
+        (bound, cumulative - previous.get(bound, 0))
+        for bound, cumulative in after.get("", {}).get("buckets", [])
+    ]
+    if not buckets or buckets[-1][1] == 0:
+        return {"count": 0}
+
+    count = buckets[-1][1]
+    total = after[""]["sum"] - before.get("", {}).get("sum", 0.0)
+
+    def quantile(value: float) -> str:
+        return next(
+            bound for bound, cumulative in buckets if cumulative >= value * count
+        )
+
+    return {
+        "count": count,
+        "mean_ms": round(total / count * 1000, 3),
+        "p50_le_s": quantile(0.5),
+        "p95_le_s": quantile(0.95),
+        "p99_le_s": quantile(0.99),
+    }
+
+
+async def start_server(directory: str, port: int) -> subprocess.Popen:
+    log = open(os.path.join(directory, "server.log"), "w")
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, "main.py")],
+        cwd=directory,
+        env={
+            **os.environ,
+            "PYTHONPATH": SRC_DIR,
+            "PYTHONUNBUFFERED": "1",
+            "ZOUND_AUDIO_BACKEND": "null",
+            "ZOUND_PORT": str(port),
+        },
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited, see {log.name}")
+        try:
+            client = await ZoundClient.connect(f"ws://localhost:{port}")
+            await client.close()
+            return server
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    server.kill()
+    raise RuntimeError(f"Server did not start, see {log.name}")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+async def prepare_sounds(client: ZoundClient, sounds: list[dict]) -> list[int]:
+    await client.request({"type": IncomingEvent.SOUND_ADD_BATCH, "data": sounds})
+
+    # Wait for the background import, so plays measure playback and not decoding.
+    deadline = time.perf_counter() + 60
+    while True:
+        await client.request({"type": IncomingEvent.SOUND_FETCH})
+        fetched = (await client.wait_for(OutgoingEvent.SOUND_FETCHED))["sounds"]
+        if all(sound["duration"] is not None for sound in fetched):
+            return [sound["id"] for sound in fetched]
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Sounds were not imported in time")
+
+        await asyncio.sleep(0.2)
+
+
+async def fetch_metrics(client: ZoundClient) -> dict:
+    await client.request({"type": IncomingEvent.METRICS_FETCH})
+    return (await client.wait_for(OutgoingEvent.METRICS_FETCHED))["metrics"]
+
+
+async def drive(
+    url: str, args: argparse.Namespace, sound_ids: list[int], seed: int
+) -> dict:
+    """
+    Send events from one client at its share of the target rate, recording the
+    latency of each acknowledgement.
+    """
+
+    rng = random.Random(seed)
+    weights = parse_mix(args.mix)
+    names, weights = list(weights), list(weights.values())
+
+    client = await ZoundClient.connect(url, keep_messages=False)
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {}
+    replies = []
+
+    def record(name: str, sent_at: float, future: asyncio.Future) -> None:
+        if future.cancelled():
+            errors["unanswered"] = errors.get("unanswered", 0) + 1
+            return
+
+        message = future.result()
+        if message["type"] == OutgoingEvent.EVENT_HANDLED:
+            latencies[name].append(time.perf_counter() - sent_at)
+        else:
+            errors[message["type"]] = errors.get(message["type"], 0) + 1
+
+    interval = args.clients / args.rate
+    started = time.perf_counter() + rng.uniform(0, interval)
+    for index in range(int(args.duration / interval)):
+        await asyncio.sleep(max(0.0, started + index * interval - time.perf_counter()))
+
+        name = rng.choices(names, weights)[0]
+        sent_at = time.perf_counter()
+        future = await client.send(build_event(name, sound_ids, rng))
+        future.add_done_callback(lambda f, n=name, s=sent_at: record(n, s, f))
+        replies.append(future)
+
+    await asyncio.wait(replies, timeout=args.drain)
+    received = client.received
+    await client.close()
+
+    return {"latencies": latencies, "errors": errors, "received": received}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    directory = tempfile.mkdtemp(prefix="zound-load-")
+    port = free_port()
+    url = f"ws://localhost:{port}"
+
+    server = await start_server(directory, port)
+    try:
+        setup = await ZoundClient.connect(url)
+        sound_ids = await prepare_sounds(
+            setup, write_sounds(directory, args.sounds, args.sound_seconds)
+        )
+        before = await fetch_metrics(setup)
+
+        results = []
+
+        async def workload() -> None:
+            results.extend(
+                await asyncio.gather(
+                    *(
+                        drive(url, args, sound_ids, args.seed + index)
+                        for index in range(args.clients)
+                    )
+                )
+            )
+
+        started = time.perf_counter()
+        client_lag = await measure_stall(workload)
+        elapsed = time.perf_counter() - started
+
+        after = await fetch_metrics(setup)
+        await setup.close()
+    finally:
+        stop_server(server)
+
+    latencies: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    for result in results:
+        for name, samples in result["latencies"].items():
+            latencies.setdefault(name, []).extend(samples)
+        for name, count in result["errors"].items():
+            errors[name] = errors.get(name, 0) + count
+
+    handled = sum(len(samples) for samples in latencies.values())
+    lag_name = "event_loop_lag_seconds"
+    return {
+        "clients": args.clients,
+        "target_rate": args.rate,
+        "duration_s": args.duration,
+        "mix": parse_mix(args.mix),
+        "handled": handled,
+        "errors": errors,
+        "throughput_per_s": round(handled / elapsed, 1),
+        "messages_received": sum(result["received"] for result in results),
+        "latency": {
+            "all": percentiles(
+                [sample for samples in latencies.values() for sample in samples]
+            ),
+            **{name: percentiles(samples) for name, samples in latencies.items()},
+        },
+        "server_loop_lag": histogram_delta(
+            before["histograms"].get(lag_name, {}), after["histograms"][lag_name]
+        ),
+        "client_loop_lag": client_lag,
+        "server_log": os.path.join(directory, "server.log"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=200.0, help="Events per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    parser.add_argument("--mix", default="fetch=40,play=30,stop=20,config=10")
+    parser.add_argument("--sounds", type=int, default=20)
+    parser.add_argument("--sound-seconds", type=float, default=0.5)
+    parser.add_argument("--drain", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
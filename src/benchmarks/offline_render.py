@@ -0,0 +1,118 @@
+"""
+Faster-than-realtime rendering through the output backends.
+
+Measures decode throughput, and mix plus gain throughput through the null
+backend, in samples per second. Then renders a known voice through the WAV
+backend and checks that the file holds exactly the expected samples. Exits with
+a non-zero status on a mismatch.
+Run from the src directory with: python -m benchmarks.offline_render
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+
+def measure_decode(directory: str, seconds: float) -> dict:
+    from audio.pcm_cache import PCMCache
+
+    path = os.path.join(directory, "decode.wav")
+    rng = np.random.default_rng(0)
+    sf.write(path, rng.uniform(-0.5, 0.5, (int(44100 * seconds), 2)), 44100)
+
+    started = time.perf_counter()
+    sound = PCMCache(1024 * 1024 * 1024).get(path)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "seconds_of_audio": seconds,
+        "samples_per_s": round(sound.frames.size / elapsed),
+    }
+
+
+def measure_mix(voices: int, seconds: float) -> dict:
+    from audio.backends import NullBackend
+    from benchmarks.render_loop import build_mixer
+    from global_config import config
+
+    mixer = build_mixer(voices, config.channels, config.samplerate, seconds + 1)
+    frames = int(config.samplerate * seconds)
+
+    started = time.perf_counter()
+    rendered = NullBackend(realtime=False).run(mixer, threading.Event(), frames)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "voices": voices,
+        "seconds_of_audio": seconds,
+        "samples_per_s": round(rendered * config.channels / elapsed),
+        "realtime_factor": round(rendered / config.samplerate / elapsed, 1),
+    }
+
+
+def verify_wav(directory: str) -> dict:
+    """
+    Render a native-rate voice whose samples pass through every gain unchanged
+    but for the microphone volume, and compare the file with the expected mix.
+    """
+
+    from audio.backends import WavBackend
+    from audio.mixer import Mixer, Voice
+    from audio.pcm_cache import DecodedSound
+    from global_config import config
+
+    rng = np.random.default_rng(1)
+    samples = rng.uniform(-0.5, 0.5, (config.samplerate // 3, config.channels))
+    sound = DecodedSound(samples.astype(np.float32), config.samplerate, 0, 0)
+
+    mixer = Mixer(config.channels, 1, "oldest")
+    mixer.add(Voice(0, sound, config.samplerate))
+
+    frames = len(samples) + config.chunk_size // 2
+    backend = WavBackend(os.path.join(directory, "verify.wav"), realtime=False)
+    backend.open()
+    backend.run(mixer, threading.Event(), frames)
+    backend.close()
+
+    expected = np.zeros((frames, config.channels), dtype=np.float32)
+    expected[: len(samples)] = sound.frames
+    expected *= np.float32(config.microphone_volume)
+
+    written, _ = sf.read(backend.path, dtype="float32", always_2d=True)
+    return {
+        "frames": frames,
+        "bit_exact": written.shape == expected.shape
+        and np.array_equal(written, expected),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--voices", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    # The config is read from a database in the working directory.
+    directory = tempfile.mkdtemp(prefix="zound-bench-")
+    os.chdir(directory)
+
+    results = {
+        "decode": measure_decode(directory, args.seconds),
+        "mix": measure_mix(args.voices, args.seconds),
+        "wav": verify_wav(directory),
+    }
+    print(json.dumps(results, indent=2))
+
+    if not results["wav"]["bit_exact"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Microbenchmark of the mixer render loop.
+
+Run from the src directory with: python -m benchmarks.render_loop
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from audio.gain import GainRamp
+from audio.mixer import Mixer, Voice
+from audio.pcm_cache import DecodedSound
+
+
+def build_mixer(voices: int, channels: int, samplerate: int, seconds: float) -> Mixer:
+    """
+    Build a mixer playing a mix of native-rate stereo and resampled mono voices.
+    """
+
+    mixer = Mixer(channels, voices, "oldest")
+    rng = np.random.default_rng(0)
+
+    for index in range(voices):
+        rate, voice_channels = (samplerate, 2) if index % 2 else (44100, 1)
+        frames = rng.uniform(-0.5, 0.5, (int(rate * seconds), voice_channels))
+        sound = DecodedSound(frames.astype(np.float32), rate, 0, 0)
+        mixer.add(Voice(index, sound, samplerate, gain=0.5 + index / voices))
+
+    return mixer
+
+
+class RenderLoop:
+    """
+    The playback thread's per-block work: mix every voice, then apply a ramped
+    master gain into a reused output buffer.
+    """
+
+    def __init__(self, mixer: Mixer, block_size: int, channels: int) -> None:
+        self.mixer = mixer
+        self.mix = np.zeros((block_size, channels), dtype=np.float32)
+        self.output = np.empty_like(self.mix)
+        self.gain = GainRamp(block_size, channels, 0.5)
+
+    def run(self, blocks: int) -> None:
+        for block in range(blocks):
+            self.mixer.render(self.mix)
+            np.copyto(self.output, self.mix)
+            self.gain.apply(self.output, 0.5 if block % 2 else 0.6)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--voices", type=int, default=8)
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--block-size", type=int, default=1024)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--samplerate", type=int, default=48000)
+    args = parser.parse_args()
+
+    seconds = (2 * args.blocks + 10) * args.block_size / args.samplerate + 1
+    mixer = build_mixer(args.voices, args.channels, args.samplerate, seconds)
+    loop = RenderLoop(mixer, args.block_size, args.channels)
+    loop.run(10)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    loop.run(args.blocks)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    loop.run(args.blocks)
+    elapsed = time.perf_counter() - started
+
+    frames = args.blocks * args.block_size
+    print(
+        json.dumps(
+            {
+                "voices": args.voices,
+                "blocks": args.blocks,
+                "block_size": args.block_size,
+                "retained_bytes": current - baseline,
+                "peak_transient_bytes": peak - baseline,
+                "block_bytes": args.block_size * args.channels * 4,
+                "frames_per_second": round(frames / elapsed),
+                "realtime_factor": round(frames / elapsed / args.samplerate, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Encode time per outgoing event for each available serializer, compared with
+sending a cached pre-encoded payload.
+
+Run from the src directory with: python -m benchmarks.serializer
+"""
+
+import argparse
+import json
+import timeit
+
+from utils.events import OutgoingEvent
+from utils.payload_cache import PayloadCache
+from utils.serializer import JsonSerializer, OrjsonSerializer, orjson
+
+
+def build_events(sounds: int) -> dict[str, dict]:
+    """
+    Build representative outgoing events, including a catalog snapshot.
+    """
+
+    catalog = [
+        {
+            "id": index,
+            "name": f"Sound {index}",
+            "path": f"C:/Sounds/pack/sound-{index:05}.wav",
+            "is_valid": True,
+            "created_at": "2025-01-01 12:00:00",
+            "pcm_path": f"library/{index:040x}-48000-2.f32",
+            "duration": 2.5 + index % 7,
+            "sample_rate": 44100,
+            "channels": 2,
+            "peak": 0.98,
+            "rms": 0.21,
+        }
+        for index in range(sounds)
+    ]
+
+    return {
+        "sound_playing": {
+            "type": OutgoingEvent.SOUND_PLAYING,
+            "soundId": 1,
+            "voiceId": 42,
+        },
+        "config_fetched": {
+            "type": OutgoingEvent.CONFIG_FETCHED,
+            "config": {
+                "id": 1,
+                "headphone_volume": 0.5,
+                "microphone_volume": 0.5,
+                "headphone_muted": False,
+                "device_name_match": "voicemeeter input (vb-audio voi",
+                "device_host_api": 0,
+            },
+        },
+        "sound_fetched": {
+            "type": OutgoingEvent.SOUND_FETCHED,
+            "sounds": catalog,
+            "revision": 1,
+        },
+    }
+
+
+def time_per_call(func, repeat: int) -> float:
+    """
+    Best time of one call in microseconds.
+    """
+
+    number = max(1, repeat)
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sounds", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    serializers = [JsonSerializer()]
+    if orjson is not None:
+        serializers.append(OrjsonSerializer())
+
+    cache = PayloadCache()
+    results = {}
+
+    for name, event in build_events(args.sounds).items():
+        repeat = args.repeat if name == "sound_fetched" else args.repeat * 1000
+        result = {
+            serializer.name: round(
+                time_per_call(lambda: serializer.encode(event), repeat), 3
+            )
+            for serializer in serializers
+        }
+
+        cache.put(name, serializers[-1].encode(event), 1)
+        result["cached"] = round(time_per_call(lambda: cache.get(name, 1), repeat), 3)
+        result["bytes"] = len(cache.get(name, 1))
+
+        results[name] = result
+
+    print(json.dumps({"encode_us": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import bisect
+import threading
+import time
+from typing import NamedTuple, Union
+
+from database.models import Sound
+
+
+class CatalogPage(NamedTuple):
+    """
+    Sounds returned by a paginated fetch, and where the next page starts.
+    """
+
+    sounds: list[dict]
+    next_cursor: Union[int, None]
+    revision: int
+
+
+class CatalogChanges(NamedTuple):
+    """
+    Sounds added, updated or removed since a revision.
+    """
+
+    sounds: list[dict]
+    removed: list[int]
+    revision: int
+    has_more: bool
+
+
+class SoundCatalog:
+    """
+    In-memory copy of the sound table, indexed by ID and path.
+
+    The catalog is loaded once and kept current by the sound service writing
+    through every change, so reads never touch the database. Writes happen on the
+    database thread while reads happen on the event loop, so both take a lock.
+
+    Every change bumps the catalog revision and records it against the sound,
+    keeping tombstones for removed sounds, so clients can fetch only what changed
+    since a revision they already have. Revisions are not persisted; each load
+    starts from the current time in milliseconds, so revisions handed out before a
+    restart are older than the base and are answered with a full resync.
+    """
+
+    def __init__(self) -> None:
+        self._sounds: dict[int, Sound] = {}
+        self._dumps: dict[int, dict] = {}
+        self._paths: dict[str, int] = {}
+        self._listing: Union[list[dict], None] = None
+        self._ids: Union[list[int], None] = None
+        self._lock = threading.Lock()
+
+        self._base_revision = 0
+        self._revision = 0
+        self._changes: dict[int, int] = {}
+
+    @property
+    def revision(self) -> int:
+        """
+        Revision of the latest change.
+        """
+
+        return self._revision
+
+    def load(self, sounds: list[Sound]) -> None:
+        """
+        Replace the catalog contents.
+
+        :param sounds: Every sound record.
+        """
+
+        with self._lock:
+            self._sounds.clear()
+            self._dumps.clear()
+            self._paths.clear()
+            self._changes.clear()
+            self.__invalidate()
+
+            self._base_revision = max(self._revision + 1, time.time_ns() // 1_000_000)
+            self._revision = self._base_revision
+
+            for sound in sounds:
+                self.__put(sound, self._revision)
+
+    def get(self, id: int) -> Union[Sound, None]:
+        """
+        Get a copy of a sound record by ID.
+
+        :param id: ID of the sound.
+        """
+
+        with self._lock:
+            sound = self._sounds.get(id)
+
+        return sound.model_copy() if sound is not None else None
+
+    def get_by_path(self, path: str) -> Union[Sound, None]:
+        """
+        Get a copy of a sound record by its file path.
+
+        :param path: Path of the sound file.
+        """
+
+        with self._lock:
+            id = self._paths.get(path)
+
+        return self.get(id) if id is not None else None
+
+    def get_all(self) -> list[dict]:
+        """
+        Get every sound record, serialized. The list is shared between callers
+        until the next change and must not be modified.
+        """
+
+        with self._lock:
+            if self._listing is None:
+                self.__rebuild()
+
+            return self._listing
+
+    def page(self, cursor: Union[int, None], limit: int) -> CatalogPage:
+        """
+        Get a page of sound records, serialized and ordered by ID.
+
+        :param cursor: ID after which the page starts, or None for the first page.
+        :param limit: Maximum number of sounds in the page.
+        """
+
+        with self._lock:
+            if self._listing is None or self._ids is None:
+                self.__rebuild()
+
+            start = 0 if cursor is None else bisect.bisect_right(self._ids, cursor)
+            end = start + limit
+
+            return CatalogPage(
+                self._listing[start:end],
+                self._ids[end - 1] if end < len(self._ids) else None,
+                self._revision,
+            )
+
+    def changes(self, since: int, limit: int) -> Union[CatalogChanges, None]:
+        """
+        Get the sound records changed after a revision, oldest change first, or
+        None when the revision predates the catalog and a full fetch is needed.
+
+        :param since: Revision the client already has.
+        :param limit: Maximum number of changes returned.
+        """
+
+        with self._lock:
+            if since < self._base_revision or since > self._revision:
+                return None
+
+            changed = []
+            for id, revision in reversed(self._changes.items()):
+                if revision <= since:
+                    break
+                changed.append((id, revision))
+
+            changed.reverse()
+            has_more = len(changed) > limit
+            changed = changed[:limit]
+
+            return CatalogChanges(
+                [self._dumps[id] for id, _ in changed if id in self._dumps],
+                [id for id, _ in changed if id not in self._dumps],
+                changed[-1][1] if changed else since,
+                has_more,
+            )
+
+    def put(self, sound: Sound) -> dict:
+        """
+        Add or replace a sound record, returning it serialized.
+
+        :param sound: The sound record, which the catalog takes ownership of.
+        """
+
+        with self._lock:
+            self._revision += 1
+            return self.__put(sound, self._revision)
+
+    def remove(self, id: int) -> None:
+        """
+        Remove a sound record by ID.
+
+        :param id: ID of the sound.
+        """
+
+        with self._lock:
+            sound = self._sounds.pop(id, None)
+            if sound is None:
+                return
+
+            del self._dumps[id]
+            if self._paths.get(sound.path) == id:
+                del self._paths[sound.path]
+
+            self._revision += 1
+            self.__touch(id, self._revision)
+            self.__invalidate()
+
+    def __put(self, sound: Sound, revision: int) -> dict:
+        previous = self._sounds.get(sound.id)
+        if previous is not None and self._paths.get(previous.path) == sound.id:
+            del self._paths[previous.path]
+
+        dump = sound.model_dump()
+
+        self._sounds[sound.id] = sound
+        self._dumps[sound.id] = dump
+        self._paths[sound.path] = sound.id
+        self.__touch(sound.id, revision)
+        self.__invalidate()
+
+        return dump
+
+    def __touch(self, id: int, revision: int) -> None:
+        # Reinserting keeps the change log ordered by revision.
+        self._changes.pop(id, None)
+        self._changes[id] = revision
+
+    def __invalidate(self) -> None:
+        self._listing = None
+        self._ids = None
+
+    def __rebuild(self) -> None:
+        self._ids = sorted(self._dumps)
+        self._listing = [self._dumps[id] for id in self._ids]
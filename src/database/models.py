@@ -1,6 +1,18 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+SOUND_EXTENSIONS = (".mp3", ".wav")
+
+
+def is_sound_path(path: str) -> bool:
+    """
+    Check whether a path has the extension of a supported sound file, in any case.
+
+    :param path: Path to the sound file.
+    """
+
+    return path.lower().endswith(SOUND_EXTENSIONS)
 
 
 class Sound(BaseModel):
@@ -9,19 +21,60 @@ class Sound(BaseModel):
     path: str = Field(..., min_length=1, max_length=255, title="Sound Path")
     is_valid: bool = Field(default=True, title="Is Valid")
     created_at: Optional[str] = Field(None, title="Creation Date")
+    pcm_path: Optional[str] = Field(None, title="Library PCM Path")
+    source_mtime_ns: Optional[int] = Field(None, title="Analyzed File mtime in ns")
+    source_size: Optional[int] = Field(None, title="Analyzed File Size")
+    duration: Optional[float] = Field(None, title="Duration in Seconds")
+    sample_rate: Optional[int] = Field(None, title="Sample Rate")
+    channels: Optional[int] = Field(None, title="Channel Count")
+    peak: Optional[float] = Field(None, title="Peak Amplitude")
+    rms: Optional[float] = Field(None, title="RMS Amplitude")
+    trim_start: Optional[float] = Field(None, ge=0.0, title="Trim Start in Seconds")
+    trim_end: Optional[float] = Field(None, gt=0.0, title="Trim End in Seconds")
+    pinned: bool = Field(default=False, title="Pinned to the Hot Set")
+    head_ms: Optional[int] = Field(
+        None, ge=1, le=10000, title="Preloaded Head in Milliseconds"
+    )
+    priority: int = Field(default=0, title="Play Priority")
 
     @field_validator("path")
     @classmethod
     def validate_path(cls, path: str) -> str:
         """
-        Validate the sound path to ensure it ends with .mp3 or .wav.
+        Validate the sound path to ensure it ends with .mp3 or .wav, in any case.
         """
 
-        if not path.endswith((".mp3", ".wav")):
+        if not is_sound_path(path):
             raise ValueError("Sound path must end with .mp3 or .wav")
 
         return path
 
+    @model_validator(mode="after")
+    def validate_trim(self) -> "Sound":
+        """
+        Validate the trim points to ensure the trimmed region is not empty.
+        """
+
+        if (
+            self.trim_start is not None
+            and self.trim_end is not None
+            and self.trim_end <= self.trim_start
+        ):
+            raise ValueError("Trim end must be after trim start")
+
+        return self
+
+
+class SoundMetadata(BaseModel):
+    duration: float = Field(..., ge=0.0, title="Duration in Seconds")
+    sample_rate: int = Field(..., gt=0, title="Sample Rate")
+    channels: int = Field(..., gt=0, title="Channel Count")
+    peak: float = Field(..., ge=0.0, title="Peak Amplitude")
+    rms: float = Field(..., ge=0.0, title="RMS Amplitude")
+    pcm_path: Optional[str] = Field(None, title="Library PCM Path")
+    source_mtime_ns: Optional[int] = Field(None, title="Analyzed File mtime in ns")
+    source_size: Optional[int] = Field(None, ge=0, title="Analyzed File Size")
+
 
 class UpdateSound(BaseModel):
     id: int = Field(title="Sound ID")
@@ -31,19 +84,39 @@ class UpdateSound(BaseModel):
     path: Optional[str] = Field(
         default=None, min_length=1, max_length=255, title="Sound Path"
     )
+    trim_start: Optional[float] = Field(None, ge=0.0, title="Trim Start in Seconds")
+    trim_end: Optional[float] = Field(None, gt=0.0, title="Trim End in Seconds")
+    pinned: Optional[bool] = Field(default=None, title="Pinned to the Hot Set")
+    head_ms: Optional[int] = Field(
+        None, ge=1, le=10000, title="Preloaded Head in Milliseconds"
+    )
+    priority: Optional[int] = Field(default=None, title="Play Priority")
 
     @field_validator("path")
     @classmethod
     def validate_path(cls, path: str) -> str:
         """
-        Validate the sound path to ensure it ends with .mp3 or .wav.
+        Validate the sound path to ensure it ends with .mp3 or .wav, in any case.
         """
 
-        if path is not None and not path.endswith((".mp3", ".wav")):
+        if path is not None and not is_sound_path(path):
             raise ValueError("Sound path must end with .mp3 or .wav")
 
         return path
 
+    def changes(self) -> dict:
+        """
+        Get the fields to update. Name, path, pinned and priority are only updated
+        when not null, while trim points and head length set to null are cleared.
+        """
+
+        changes = self.model_dump(exclude_unset=True, exclude={"id"})
+        for field in ("name", "path", "pinned", "priority"):
+            if changes.get(field, "") is None:
+                del changes[field]
+
+        return changes
+
 
 class Config(BaseModel):
     id: Optional[int] = Field(default=None, title="Config ID")
@@ -54,3 +127,12 @@ class Config(BaseModel):
         default=0.5, ge=0.0, le=1.0, title="Microphone Volume"
     )
     headphone_muted: bool = Field(default=False, title="Headphone Muted")
+    device_name_match: str = Field(
+        default="voicemeeter input (vb-audio voi",
+        min_length=1,
+        max_length=255,
+        title="Playback Device Name Match",
+    )
+    device_host_api: Optional[int] = Field(
+        default=0, ge=0, title="Playback Device Host API"
+    )
@@ -20,3 +20,10 @@ class AbstractRepository:
         """
 
         self.__conn.commit()
+
+    def _rollback(self):
+        """
+        Roll back the current transaction.
+        """
+
+        self.__conn.rollback()
@@ -15,7 +15,8 @@ class ConfigRepository(AbstractRepository):
     def get(self) -> Union[Config, None]:
         self._cursor.execute(
             """
-            SELECT id, headphone_volume, microphone_volume, headphone_muted
+            SELECT id, headphone_volume, microphone_volume, headphone_muted,
+                device_name_match, device_host_api
             FROM config
             WHERE id = 1
             """
@@ -27,6 +28,8 @@ class ConfigRepository(AbstractRepository):
                 headphone_volume=row[1],
                 microphone_volume=row[2],
                 headphone_muted=row[3],
+                device_name_match=row[4],
+                device_host_api=row[5],
             )
 
         return None
@@ -35,9 +38,16 @@ class ConfigRepository(AbstractRepository):
         self._cursor.execute(
             """
             UPDATE config
-            SET headphone_volume = ?, microphone_volume = ?, headphone_muted = ?
+            SET headphone_volume = ?, microphone_volume = ?, headphone_muted = ?,
+                device_name_match = ?, device_host_api = ?
             WHERE id = 1
             """,
-            (config.headphone_volume, config.microphone_volume, config.headphone_muted),
+            (
+                config.headphone_volume,
+                config.microphone_volume,
+                config.headphone_muted,
+                config.device_name_match,
+                config.device_host_api,
+            ),
         )
         self._commit()
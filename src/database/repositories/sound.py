@@ -1,8 +1,29 @@
 from typing import Union
 
-from database.models import Sound, UpdateSound
+from database.models import Sound, SoundMetadata, UpdateSound
 from database.repositories.abstract_repository import AbstractRepository
 
+SOUND_COLUMNS = (
+    "id",
+    "name",
+    "path",
+    "is_valid",
+    "created_at",
+    "pcm_path",
+    "source_mtime_ns",
+    "source_size",
+    "duration",
+    "sample_rate",
+    "channels",
+    "peak",
+    "rms",
+    "trim_start",
+    "trim_end",
+    "pinned",
+    "head_ms",
+    "priority",
+)
+
 
 class SoundRepository(AbstractRepository):
     """
@@ -13,46 +34,85 @@ class SoundRepository(AbstractRepository):
         super().__init__()
 
     def create(self, sound: Sound) -> Sound:
-        self._cursor.execute(
+        sound.id, sound.created_at = self._cursor.execute(
             """
-            INSERT INTO sound (name, path)
-            VALUES (?, ?)
+            INSERT INTO sound (
+                name, path, trim_start, trim_end, pinned, head_ms, priority
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            RETURNING id, created_at
             """,
-            (sound.name, sound.path),
-        )
+            (
+                sound.name,
+                sound.path,
+                sound.trim_start,
+                sound.trim_end,
+                sound.pinned,
+                sound.head_ms,
+                sound.priority,
+            ),
+        ).fetchone()
         self._commit()
 
-        sound.id = self._cursor.lastrowid
-        sound.created_at = self._cursor.execute(
-            """
-            SELECT created_at
-            FROM sound
-            WHERE id = ?
-            """,
-            (sound.id,),
+        return sound
+
+    def create_many(self, sounds: list[Sound]) -> list[Sound]:
+        last_id = self._cursor.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM sound"
         ).fetchone()[0]
 
-        return sound
+        try:
+            self._cursor.executemany(
+                """
+                INSERT INTO sound (
+                    name, path, trim_start, trim_end, pinned, head_ms, priority
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        sound.name,
+                        sound.path,
+                        sound.trim_start,
+                        sound.trim_end,
+                        sound.pinned,
+                        sound.head_ms,
+                        sound.priority,
+                    )
+                    for sound in sounds
+                ],
+            )
+            self._cursor.execute(
+                f"""
+                SELECT {", ".join(SOUND_COLUMNS)}
+                FROM sound
+                WHERE id > ?
+                ORDER BY id
+                """,
+                (last_id,),
+            )
+            rows = self._cursor.fetchall()
+            self._commit()
+        except Exception:
+            self._rollback()
+            raise
+
+        return [self.__to_sound(row) for row in rows]
 
     def get_all(self) -> list[Sound]:
         self._cursor.execute(
-            """
-            SELECT id, name, path, is_valid, created_at
+            f"""
+            SELECT {", ".join(SOUND_COLUMNS)}
             FROM sound
             """
         )
         rows = self._cursor.fetchall()
-        return [
-            Sound(
-                id=row[0], name=row[1], path=row[2], is_valid=row[3], created_at=row[4]
-            )
-            for row in rows
-        ]
+        return [self.__to_sound(row) for row in rows]
 
     def get(self, id: int) -> Union[Sound, None]:
         self._cursor.execute(
-            """
-            SELECT id, name, path, is_valid, created_at
+            f"""
+            SELECT {", ".join(SOUND_COLUMNS)}
             FROM sound
             WHERE id = ?
             """,
@@ -60,20 +120,15 @@ class SoundRepository(AbstractRepository):
         )
         row = self._cursor.fetchone()
         if row:
-            return Sound(
-                id=row[0], name=row[1], path=row[2], is_valid=row[3], created_at=row[4]
-            )
+            return self.__to_sound(row)
 
         return None
 
-    def update(self, id: int, sound: UpdateSound) -> Union[Sound, None]:
-        fields = {
-            "name": sound.name,
-            "path": sound.path,
-        }
+    def update(self, id: int, sound: UpdateSound) -> None:
+        fields = sound.changes()
 
-        updates = [f"{key} = ?" for key, value in fields.items() if value is not None]
-        values = [value for value in fields.values() if value is not None]
+        updates = [f"{key} = ?" for key in fields]
+        values = list(fields.values())
 
         if updates:
             query = f"UPDATE sound SET {', '.join(updates)} WHERE id = ?"
@@ -82,8 +137,6 @@ class SoundRepository(AbstractRepository):
             self._cursor.execute(query, tuple(values))
             self._commit()
 
-        return self.get(id)
-
     def delete(self, id: int) -> None:
         self._cursor.execute(
             """
@@ -104,3 +157,51 @@ class SoundRepository(AbstractRepository):
             (is_valid, id),
         )
         self._commit()
+
+    def set_is_valid_many(self, validity: dict[int, bool]) -> None:
+        self._cursor.executemany(
+            """
+            UPDATE sound
+            SET is_valid = ?
+            WHERE id = ?
+            """,
+            [(is_valid, id) for id, is_valid in validity.items()],
+        )
+        self._commit()
+
+    def set_pcm_path(self, id: int, pcm_path: Union[str, None]) -> None:
+        self._cursor.execute(
+            """
+            UPDATE sound
+            SET pcm_path = ?
+            WHERE id = ?
+            """,
+            (pcm_path, id),
+        )
+        self._commit()
+
+    def set_metadata(self, id: int, metadata: SoundMetadata) -> None:
+        self._cursor.execute(
+            """
+            UPDATE sound
+            SET duration = ?, sample_rate = ?, channels = ?, peak = ?, rms = ?,
+                pcm_path = COALESCE(?, pcm_path), source_mtime_ns = ?,
+                source_size = ?, is_valid = 1
+            WHERE id = ?
+            """,
+            (
+                metadata.duration,
+                metadata.sample_rate,
+                metadata.channels,
+                metadata.peak,
+                metadata.rms,
+                metadata.pcm_path,
+                metadata.source_mtime_ns,
+                metadata.source_size,
+                id,
+            ),
+        )
+        self._commit()
+
+    def __to_sound(self, row: tuple) -> Sound:
+        return Sound(**dict(zip(SOUND_COLUMNS, row)))
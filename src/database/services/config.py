@@ -1,34 +1,98 @@
+from typing import Union
+
 from database.models import Config
 from database.repositories.config import ConfigRepository
+from database.sqlite import sqlite
 from utils.errors import ConfigNotFoundError, ValidationError
 
 
 class ConfigService:
     """
     Service for managing config record.
+
+    The config is kept in memory, loaded at startup, so updates apply at once.
+    Writes are decoupled from updates: persist writes the latest config only if
+    it changed since the last write, so a burst of updates costs a single write.
     """
 
     __config_repository: ConfigRepository = ConfigRepository()
+    __config: Union[Config, None] = None
+    __dirty: bool = False
+
+    def __init__(self) -> None:
+        """
+        Initialize the service, loading the config from the database once.
+        """
+
+        if ConfigService.__config is None:
+            config = sqlite.run_sync(self.__config_repository.get)
+            if not config:
+                raise ConfigNotFoundError(1)
+
+            ConfigService.__config = config
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Whether the config changed since it was last written.
+        """
+
+        return ConfigService.__dirty
 
     def get(self) -> Config:
         """
         Get config record.
         """
 
-        config = self.__config_repository.get()
-        if not config:
-            raise ConfigNotFoundError(1)
+        return ConfigService.__config.model_copy()
 
-        return config
-
-    def update(self, config: dict) -> None:
+    def update(self, config: dict) -> Config:
         """
-        Update config record.
+        Update config record in memory. Fields missing from the update keep their
+        value. The change is written by the next persist.
         """
 
         try:
-            updated_config = Config.model_validate(config)
+            updated_config = Config.model_validate(
+                {**ConfigService.__config.model_dump(), **config}
+            )
         except Exception as error:
             raise ValidationError(str(error))
 
-        self.__config_repository.update(updated_config)
+        ConfigService.__config = updated_config
+        ConfigService.__dirty = True
+        return updated_config.model_copy()
+
+    async def persist(self) -> None:
+        """
+        Write the config on the database thread, if it changed since last written.
+        """
+
+        if not ConfigService.__dirty:
+            return
+
+        ConfigService.__dirty = False
+        try:
+            await sqlite.run(self.__config_repository.update, ConfigService.__config)
+        except Exception:
+            ConfigService.__dirty = True
+            raise
+
+    def persist_blocking(self) -> None:
+        """
+        Write the config if it changed, from outside the event loop, such as at
+        shutdown.
+        """
+
+        if not ConfigService.__dirty:
+            return
+
+        ConfigService.__dirty = False
+        sqlite.run_sync(self.__config_repository.update, ConfigService.__config)
+
+    def get_blocking(self) -> Config:
+        """
+        Get config record from outside the event loop, such as at startup.
+        """
+
+        return self.get()
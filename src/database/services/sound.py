@@ -1,15 +1,40 @@
-from database.models import Sound, UpdateSound
+from typing import Union
+
+from database.catalog import CatalogChanges, CatalogPage, SoundCatalog
+from database.models import Sound, SoundMetadata, UpdateSound
 from database.repositories.sound import SoundRepository
+from database.sqlite import database_task, sqlite
 from utils.errors import SoundNotFoundError, ValidationError
 
 
 class SoundService:
     """
     Service for managing sound records.
+
+    Reads are served from an in-memory catalog loaded at startup. Writes run on
+    the database thread, return a coroutine and update the catalog once they are
+    committed.
     """
 
     __sound_repository: SoundRepository = SoundRepository()
+    __catalog: SoundCatalog = SoundCatalog()
+
+    def __init__(self) -> None:
+        """
+        Initialize the service, loading the catalog from the database.
+        """
+
+        self.__catalog.load(sqlite.run_sync(self.__sound_repository.get_all))
+
+    @property
+    def revision(self) -> int:
+        """
+        Revision of the latest change to the sound records.
+        """
 
+        return self.__catalog.revision
+
+    @database_task
     def create(self, sound: dict) -> dict:
         """
         Create a new sound record.
@@ -21,60 +46,183 @@ class SoundService:
             raise ValidationError(str(error))
 
         created_sound = self.__sound_repository.create(new_sound)
-        return created_sound.model_dump()
+        return self.__catalog.put(created_sound)
+
+    @database_task
+    def create_many(self, sounds: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Create sound records in a single transaction, returning the created
+        records and an error for every item that was skipped. Items that fail
+        validation or whose path is already in the catalog are skipped.
+        """
+
+        new_sounds = []
+        errors = []
+        paths = set()
+
+        for index, sound in enumerate(sounds):
+            try:
+                new_sound = Sound.model_validate(sound)
+            except Exception as error:
+                errors.append({"index": index, "error": str(error)})
+                continue
+
+            if new_sound.path in paths or self.get_by_path(new_sound.path):
+                errors.append(
+                    {
+                        "index": index,
+                        "path": new_sound.path,
+                        "error": "Sound path already exists",
+                    }
+                )
+                continue
+
+            paths.add(new_sound.path)
+            new_sounds.append(new_sound)
+
+        if not new_sounds:
+            return [], errors
+
+        created_sounds = self.__sound_repository.create_many(new_sounds)
+        return [self.__catalog.put(sound) for sound in created_sounds], errors
 
     def get_all(self) -> list[dict]:
         """
-        Get all sound records.
+        Get all sound records. The list is shared and must not be modified.
+        """
+
+        return self.__catalog.get_all()
+
+    def page(self, cursor: Union[int, None], limit: int) -> CatalogPage:
+        """
+        Get a page of sound records ordered by ID, starting after the cursor.
         """
 
-        sounds = [sound.model_dump() for sound in self.__sound_repository.get_all()]
-        return sounds
+        return self.__catalog.page(cursor, limit)
+
+    def changes(self, since: int, limit: int) -> Union[CatalogChanges, None]:
+        """
+        Get the sound records added, updated or removed after a revision, or None
+        if the revision is unknown and a full fetch is needed.
+        """
+
+        return self.__catalog.changes(since, limit)
 
     def get(self, id: int) -> Sound:
         """
         Get a sound record by ID.
         """
 
-        sound = self.__sound_repository.get(id)
+        sound = self.__catalog.get(id)
         if not sound:
             raise SoundNotFoundError(id)
 
         return sound
 
+    def get_by_path(self, path: str) -> Union[Sound, None]:
+        """
+        Get a sound record by its file path, if any.
+        """
+
+        return self.__catalog.get_by_path(path)
+
+    @database_task
     def update(self, id: int, sound: dict) -> dict:
         """
         Update a sound record by ID.
         """
 
+        current_sound = self.get(id)
+
         try:
             sound = UpdateSound.model_validate(sound)
+            updated_sound = Sound.model_validate(
+                {**current_sound.model_dump(), **sound.changes()}
+            )
         except Exception as error:
             raise ValidationError(str(error))
 
-        updated_sound = self.__sound_repository.update(id, sound)
-        return updated_sound.model_dump()
+        self.__sound_repository.update(id, sound)
+        return self.__catalog.put(updated_sound)
 
-    def delete(self, id: int) -> None:
+    @database_task
+    def delete(self, id: int) -> Sound:
         """
-        Delete a sound record by ID.
+        Delete a sound record by ID, returning the deleted record.
         """
 
-        sound = self.__sound_repository.get(id)
-        if not sound:
-            raise SoundNotFoundError(id)
+        sound = self.get(id)
 
         self.__sound_repository.delete(id)
+        self.__catalog.remove(id)
+        return sound
 
-    def set_is_valid(self, id: int, is_valid: bool) -> None:
+    @database_task
+    def set_is_valid(self, id: int, is_valid: bool) -> dict:
         """
         Set the validity of a sound record by ID.
         """
 
-        sound = self.__sound_repository.get(id)
-        if not sound:
-            raise SoundNotFoundError(id)
+        sound = self.get(id)
 
         self.__sound_repository.set_is_valid(id, is_valid)
         sound.is_valid = is_valid
-        return sound.model_dump()
+        return self.__catalog.put(sound)
+
+    @database_task
+    def set_is_valid_many(self, validity: dict[int, bool]) -> list[dict]:
+        """
+        Set the validity of several sound records in a single transaction.
+        Sounds no longer in the catalog are skipped.
+        """
+
+        sounds = {}
+        for id, is_valid in validity.items():
+            sound = self.__catalog.get(id)
+            if sound is not None:
+                sound.is_valid = is_valid
+                sounds[id] = sound
+
+        if not sounds:
+            return []
+
+        self.__sound_repository.set_is_valid_many(
+            {id: sound.is_valid for id, sound in sounds.items()}
+        )
+        return [self.__catalog.put(sound) for sound in sounds.values()]
+
+    @database_task
+    def set_pcm_path(self, id: int, pcm_path: Union[str, None]) -> dict:
+        """
+        Set the library PCM path of a sound record by ID.
+        """
+
+        sound = self.get(id)
+
+        self.__sound_repository.set_pcm_path(id, pcm_path)
+        sound.pcm_path = pcm_path
+        return self.__catalog.put(sound)
+
+    @database_task
+    def set_metadata(self, id: int, metadata: dict) -> dict:
+        """
+        Store the analyzed audio properties of a sound record by ID and mark it
+        as valid.
+        """
+
+        try:
+            sound_metadata = SoundMetadata.model_validate(metadata)
+        except Exception as error:
+            raise ValidationError(str(error))
+
+        sound = self.get(id)
+
+        self.__sound_repository.set_metadata(id, sound_metadata)
+        return self.__catalog.put(
+            sound.model_copy(
+                update={
+                    **sound_metadata.model_dump(exclude_none=True),
+                    "is_valid": True,
+                }
+            )
+        )
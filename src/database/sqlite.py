@@ -1,10 +1,20 @@
+import asyncio
+import functools
 import sqlite3
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+from utils.logger import get_logger
+
+log = get_logger("database")
 
 
 class SQLite:
     """
     SQLite class to manage the database connection.
+
+    A single connection in WAL mode is owned by a dedicated database thread. Every
+    query runs on that thread, so commits and fsyncs never stall the event loop.
     """
 
     _instance: Union["SQLite", None] = None
@@ -22,21 +32,64 @@ class SQLite:
         SQLite._instance = self
         self.db_path = db_path
 
-        self.__initialize_database()
+        self.__connection: Union[sqlite3.Connection, None] = None
+        self.__executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="sqlite",
+            initializer=self.__connect,
+        )
+
+        self.run_sync(self.__initialize_database)
 
     def connection(self: "SQLite") -> sqlite3.Connection:
         """
-        Get the SQLite connection.
+        Get the shared SQLite connection. It must only be used from the database
+        thread, through run or run_sync.
+        """
+
+        return self._instance.__connection
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run a function on the database thread and wait for its result without
+        blocking the event loop.
+
+        :param func: The function to run.
+        :param args: Arguments passed to the function.
         """
 
-        return sqlite3.connect(self._instance.db_path)
+        return await asyncio.wrap_future(self.__executor.submit(func, *args))
+
+    def run_sync(self, func: Callable, *args: Any) -> Any:
+        """
+        Run a function on the database thread and block until it returns.
+        Only meant for callers outside the event loop, such as startup code.
+
+        :param func: The function to run.
+        :param args: Arguments passed to the function.
+        """
+
+        return self.__executor.submit(func, *args).result()
+
+    def close(self) -> None:
+        """
+        Close the connection and stop the database thread.
+        """
+
+        self.run_sync(self.__connection.close)
+        self.__executor.shutdown()
+
+    def __connect(self) -> None:
+        self.__connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
 
     def __initialize_database(self) -> None:
         """
         Initialize the database and create the tables if they do not exist.
         """
 
-        print("✨ Initializing database...")
+        log.info("✨ Initializing database...")
         with self.connection() as connection:
             cursor = connection.cursor()
 
@@ -46,7 +99,20 @@ class SQLite:
                 name VARCHAR(255) NOT NULL,
                 path VARCHAR(255) NOT NULL,
                 is_valid BOOLEAN NOT NULL DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                pcm_path VARCHAR(255),
+                source_mtime_ns INTEGER,
+                source_size INTEGER,
+                duration REAL,
+                sample_rate INTEGER,
+                channels INTEGER,
+                peak REAL,
+                rms REAL,
+                trim_start REAL,
+                trim_end REAL,
+                pinned BOOLEAN NOT NULL DEFAULT 0,
+                head_ms INTEGER,
+                priority INTEGER NOT NULL DEFAULT 0
             );
             """
 
@@ -55,13 +121,45 @@ class SQLite:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 headphone_volume REAL NOT NULL,
                 microphone_volume REAL NOT NULL,
-                headphone_muted BOOLEAN NOT NULL
+                headphone_muted BOOLEAN NOT NULL,
+                device_name_match VARCHAR(255) NOT NULL
+                    DEFAULT 'voicemeeter input (vb-audio voi',
+                device_host_api INTEGER DEFAULT 0
             );
             """
 
             cursor.execute(sound_table)
             cursor.execute(config_table)
 
+            self.__add_missing_columns(
+                cursor,
+                "sound",
+                {
+                    "pcm_path": "VARCHAR(255)",
+                    "source_mtime_ns": "INTEGER",
+                    "source_size": "INTEGER",
+                    "duration": "REAL",
+                    "sample_rate": "INTEGER",
+                    "channels": "INTEGER",
+                    "peak": "REAL",
+                    "rms": "REAL",
+                    "trim_start": "REAL",
+                    "trim_end": "REAL",
+                    "pinned": "BOOLEAN NOT NULL DEFAULT 0",
+                    "head_ms": "INTEGER",
+                    "priority": "INTEGER NOT NULL DEFAULT 0",
+                },
+            )
+            self.__add_missing_columns(
+                cursor,
+                "config",
+                {
+                    "device_name_match": "VARCHAR(255) NOT NULL "
+                    "DEFAULT 'voicemeeter input (vb-audio voi'",
+                    "device_host_api": "INTEGER DEFAULT 0",
+                },
+            )
+
             cursor.execute("SELECT COUNT(*) FROM config")
             count = cursor.fetchone()[0]
             if count == 0:
@@ -73,7 +171,39 @@ class SQLite:
                 )
 
             connection.commit()
-            print("✅ Database initialized successfully!")
+            log.info("✅ Database initialized successfully!")
+
+    def __add_missing_columns(
+        self, cursor: sqlite3.Cursor, table: str, columns: dict[str, str]
+    ) -> None:
+        """
+        Add columns introduced after a table was first created.
+
+        :param cursor: Cursor of the connection initializing the database.
+        :param table: Name of the table to migrate.
+        :param columns: Column definitions keyed by column name.
+        """
+
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def database_task(method: Callable) -> Callable:
+    """
+    Turn a method into a coroutine that runs it on the database thread.
+
+    :param method: The method to run on the database thread.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(*args: Any) -> Any:
+        return await sqlite.run(method, *args)
+
+    return wrapper
 
 
 sqlite = SQLite("database.db")
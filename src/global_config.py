@@ -1,7 +1,11 @@
+import os
 from typing import Union
 
 from database.models import Config
 from database.services.config import ConfigService
+from utils.logger import get_logger
+
+log = get_logger("config")
 
 
 class GlobalConfig:
@@ -20,16 +24,48 @@ class GlobalConfig:
         return cls._instance
 
     def _init(self, config: Config) -> None:
-        self._host = "localhost"
-        self._port = 4358
+        self._host = os.environ.get("ZOUND_HOST", "localhost")
+        self._port = int(os.environ.get("ZOUND_PORT", "4358"))
+        self._audio_backend = os.environ.get("ZOUND_AUDIO_BACKEND", "portaudio")
+        self._wav_output_path = os.environ.get("ZOUND_WAV_PATH", "output.wav")
 
         self._chunk_size = 1024
+        self._playback_mode = "callback"
+        self._ring_buffer_blocks = 2
+        self._pcm_cache_size = 256 * 1024 * 1024
+        self._library_enabled = os.environ.get("ZOUND_LIBRARY", "1") != "0"
+        self._library_dir = "library"
+        self._import_workers = 2
+        self._sound_fetch_limit = 500
+        self._validity_scan_interval = 10.0
+        self._client_queue_size = 64
+        self._client_max_pending = 1024
+        self._progress_rate = 4.0
+        self._head_ms = 300
+        self._hot_set_size = 16
+        self._hot_set_refresh_delay = 1.0
+        self._metrics_file = os.environ.get("ZOUND_METRICS_FILE")
+        self._metrics_dump_interval = 10.0
+        self._loop_lag_interval = 0.01
+
+        self._samplerate = 48000
+        self._channels = 2
+        self._max_voices = 8
+        self._voice_steal_policy = "oldest"
+        self._play_policy = "mix"
+        self._max_queued = 32
 
         self._headphone_volume = config.headphone_volume
         self._microphone_volume = config.microphone_volume
         self.headphone_muted = config.headphone_muted
 
-        print("🔧 Config synced with database: { " + f"{config}" + " }")
+        self._device_name_match = config.device_name_match
+        self._device_host_api = config.device_host_api
+        self._device_refresh_interval = 5.0
+        self._config_persist_delay = 0.5
+        self._config_echo_interval = 0.05
+
+        log.info("🔧 Config synced with database: { %s }", config)
 
     @property
     def host(self) -> str:
@@ -39,10 +75,110 @@ class GlobalConfig:
     def port(self) -> int:
         return self._port
 
+    @property
+    def audio_backend(self) -> str:
+        return self._audio_backend
+
+    @property
+    def wav_output_path(self) -> str:
+        return self._wav_output_path
+
     @property
     def chunk_size(self) -> int:
         return self._chunk_size
 
+    @property
+    def playback_mode(self) -> str:
+        return self._playback_mode
+
+    @property
+    def ring_buffer_blocks(self) -> int:
+        return self._ring_buffer_blocks
+
+    @property
+    def pcm_cache_size(self) -> int:
+        return self._pcm_cache_size
+
+    @property
+    def library_enabled(self) -> bool:
+        return self._library_enabled
+
+    @property
+    def library_dir(self) -> str:
+        return self._library_dir
+
+    @property
+    def import_workers(self) -> int:
+        return self._import_workers
+
+    @property
+    def sound_fetch_limit(self) -> int:
+        return self._sound_fetch_limit
+
+    @property
+    def validity_scan_interval(self) -> float:
+        return self._validity_scan_interval
+
+    @property
+    def client_queue_size(self) -> int:
+        return self._client_queue_size
+
+    @property
+    def client_max_pending(self) -> int:
+        return self._client_max_pending
+
+    @property
+    def progress_rate(self) -> float:
+        return self._progress_rate
+
+    @property
+    def head_ms(self) -> int:
+        return self._head_ms
+
+    @property
+    def hot_set_size(self) -> int:
+        return self._hot_set_size
+
+    @property
+    def hot_set_refresh_delay(self) -> float:
+        return self._hot_set_refresh_delay
+
+    @property
+    def metrics_file(self) -> Union[str, None]:
+        return self._metrics_file
+
+    @property
+    def metrics_dump_interval(self) -> float:
+        return self._metrics_dump_interval
+
+    @property
+    def loop_lag_interval(self) -> float:
+        return self._loop_lag_interval
+
+    @property
+    def samplerate(self) -> int:
+        return self._samplerate
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def max_voices(self) -> int:
+        return self._max_voices
+
+    @property
+    def voice_steal_policy(self) -> str:
+        return self._voice_steal_policy
+
+    @property
+    def play_policy(self) -> str:
+        return self._play_policy
+
+    @property
+    def max_queued(self) -> int:
+        return self._max_queued
+
     @property
     def headphone_volume(self) -> float:
         return self._headphone_volume
@@ -76,6 +212,40 @@ class GlobalConfig:
         else:
             raise ValueError("Muted status must be a boolean.")
 
+    @property
+    def device_name_match(self) -> str:
+        return self._device_name_match
+
+    @device_name_match.setter
+    def device_name_match(self, value: str) -> None:
+        if isinstance(value, str) and value:
+            self._device_name_match = value
+        else:
+            raise ValueError("Device name match must be a non-empty string.")
+
+    @property
+    def device_host_api(self) -> Union[int, None]:
+        return self._device_host_api
+
+    @device_host_api.setter
+    def device_host_api(self, value: Union[int, None]) -> None:
+        if value is None or (isinstance(value, int) and value >= 0):
+            self._device_host_api = value
+        else:
+            raise ValueError("Device host API must be a non-negative integer.")
+
+    @property
+    def device_refresh_interval(self) -> float:
+        return self._device_refresh_interval
+
+    @property
+    def config_persist_delay(self) -> float:
+        return self._config_persist_delay
+
+    @property
+    def config_echo_interval(self) -> float:
+        return self._config_echo_interval
+
 
 config_service = ConfigService()
-config = GlobalConfig(config_service.get())
+config = GlobalConfig(config_service.get_blocking())
@@ -1,6 +1,15 @@
-from . import config_handler, sound_handler
+from . import (
+    cache_handler,
+    config_handler,
+    device_handler,
+    metrics_handler,
+    sound_handler,
+)
 
 __all__ = [
+    "cache_handler",
     "config_handler",
+    "device_handler",
+    "metrics_handler",
     "sound_handler",
 ]
@@ -0,0 +1,17 @@
+import websockets
+
+from handlers.global_event_handler import GlobalEventHandler
+from sound_controller import sound_controller
+from utils.events import IncomingEvent, OutgoingEvent
+from utils.functions import send_message
+
+
+@GlobalEventHandler.register(IncomingEvent.CACHE_FETCH)
+async def handle_cache_fetch(websocket: websockets.ServerConnection, _) -> None:
+    await send_message(
+        websocket,
+        {
+            "type": OutgoingEvent.CACHE_FETCHED,
+            "cache": sound_controller.cache_stats(),
+        },
+    )
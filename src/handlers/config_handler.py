@@ -1,27 +1,82 @@
+import asyncio
+
 import websockets
 
 from database.services.config import ConfigService
 from global_config import config as global_config
 from handlers.global_event_handler import GlobalEventHandler
+from handlers.sound_handler import run_in_background
+from sound_controller import sound_controller
 from utils.errors import MissingFieldError
 from utils.events import IncomingEvent, OutgoingEvent
-from utils.functions import send_message
+from utils.functions import broadcast_message, encode_message, send_encoded
+from utils.payload_cache import payload_cache
 
 config_service = ConfigService()
+config_timers: dict[str, asyncio.TimerHandle] = {}
+
+
+def schedule_persist() -> None:
+    """
+    Write the config once updates have been quiet for the persist delay, so
+    dragging a volume slider costs a single write.
+    """
+
+    timer = config_timers.pop("persist", None)
+    if timer is not None:
+        timer.cancel()
+
+    config_timers["persist"] = asyncio.get_running_loop().call_later(
+        global_config.config_persist_delay,
+        lambda: run_in_background(persist_config()),
+    )
+
+
+async def persist_config() -> None:
+    config_timers.pop("persist", None)
+    await config_service.persist()
+
+
+def schedule_echo() -> None:
+    """
+    Broadcast the latest config at most once per echo interval, so a burst of
+    updates is echoed to clients as its latest value.
+    """
+
+    if "echo" not in config_timers:
+        config_timers["echo"] = asyncio.get_running_loop().call_later(
+            global_config.config_echo_interval, echo_config
+        )
+
+
+def echo_config() -> None:
+    config_timers.pop("echo", None)
+    broadcast_message(
+        {
+            "type": OutgoingEvent.CONFIG_UPDATED,
+            "config": config_service.get().model_dump(),
+        },
+        "config",
+    )
 
 
 @GlobalEventHandler.register(IncomingEvent.CONFIG_FETCH)
 async def handle_config_fetch(
     websocket: websockets.ServerConnection, event: dict
 ) -> None:
-    config = config_service.get()
-    await send_message(
-        websocket,
-        {
-            "type": OutgoingEvent.CONFIG_FETCHED,
-            "config": config.model_dump(),
-        },
-    )
+    payload = payload_cache.get("config")
+    if payload is None:
+        payload = payload_cache.put(
+            "config",
+            encode_message(
+                {
+                    "type": OutgoingEvent.CONFIG_FETCHED,
+                    "config": config_service.get().model_dump(),
+                }
+            ),
+        )
+
+    await send_encoded(websocket, payload)
 
 
 @GlobalEventHandler.register(IncomingEvent.CONFIG_UPDATE)
@@ -32,16 +87,22 @@ async def handle_config_update(
     if config is None:
         raise MissingFieldError("config")
 
-    config_service.update(config)
+    updated_config = config_service.update(config)
+    payload_cache.invalidate("config")
 
-    global_config.headphone_volume = config.get("headphone_volume", 0.5)
-    global_config.microphone_volume = config.get("microphone_volume", 0.5)
-    global_config.headphone_muted = config.get("headphone_muted", False)
+    global_config.headphone_volume = updated_config.headphone_volume
+    global_config.microphone_volume = updated_config.microphone_volume
+    global_config.headphone_muted = updated_config.headphone_muted
 
-    await send_message(
-        websocket,
-        {
-            "type": OutgoingEvent.CONFIG_UPDATED,
-            "config": config,
-        },
+    device_changed = (
+        updated_config.device_name_match != global_config.device_name_match
+        or updated_config.device_host_api != global_config.device_host_api
     )
+    global_config.device_name_match = updated_config.device_name_match
+    global_config.device_host_api = updated_config.device_host_api
+
+    schedule_persist()
+    schedule_echo()
+
+    if device_changed:
+        await sound_controller.restart()
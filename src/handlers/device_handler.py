@@ -0,0 +1,18 @@
+import websockets
+
+from handlers.global_event_handler import GlobalEventHandler
+from sound_controller import sound_controller
+from utils.events import IncomingEvent, OutgoingEvent
+from utils.functions import broadcast_message
+
+
+@GlobalEventHandler.register(IncomingEvent.DEVICE_REFRESH)
+async def handle_device_refresh(websocket: websockets.ServerConnection, _) -> None:
+    await sound_controller.refresh_devices()
+    broadcast_message(
+        {
+            "type": OutgoingEvent.DEVICE_REFRESHED,
+            "device": sound_controller.playback_device,
+        },
+        "device",
+    )
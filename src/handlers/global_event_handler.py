@@ -1,5 +1,5 @@
-import traceback
-from typing import Coroutine
+import time
+from typing import Coroutine, Union
 
 import websockets
 
@@ -8,8 +8,12 @@ from utils.errors import (
     MissingFieldError,
     UnsupportedEventError,
 )
-from utils.events import ErrorEvent
+from utils.events import ErrorEvent, OutgoingEvent
 from utils.functions import send_message
+from utils.logger import Truncated, get_logger
+from utils.metrics import EVENT_DISPATCH, HANDLER_DURATION
+
+log = get_logger("handlers")
 
 
 class GlobalEventHandler:
@@ -34,23 +38,33 @@ class GlobalEventHandler:
                 raise ValueError(f"❌ Event handler for {event} already registered")
 
             GlobalEventHandler.__handlers[event] = handler
-            print(f"📦 {event.value} registered event handler")
+            log.debug("📦 %s registered event handler", event.value)
             return handler
 
         return wrapper
 
     @staticmethod
-    async def handle_event(websocket: websockets.ServerConnection, event: dict) -> None:
+    async def handle_event(
+        websocket: websockets.ServerConnection,
+        event: dict,
+        received_at: Union[float, None] = None,
+    ) -> None:
         """
         Handle events received from the websocket connection.
 
         This function checks the event type and performs the corresponding action.
+        The dispatch latency and the run time of each handler are recorded. Events
+        carrying a requestId are acknowledged with EVENT:HANDLED once handled, and
+        their error replies carry the requestId too.
 
         :param websocket: The websocket connection to send the message to.
         :param event: The event received from the client.
+        :param received_at: The time.perf_counter() value the event was received at.
         """
 
+        request_id = None
         try:
+            request_id = event.get("requestId", None)
             if not event.get("type"):
                 raise MissingFieldError("type")
 
@@ -58,22 +72,46 @@ class GlobalEventHandler:
             if handler is None:
                 raise UnsupportedEventError(event["type"])
 
-            await handler(websocket, event)
+            started = time.perf_counter()
+            if received_at is not None:
+                EVENT_DISPATCH.observe(started - received_at)
+
+            try:
+                await handler(websocket, event)
+            finally:
+                HANDLER_DURATION.observe(time.perf_counter() - started, event["type"])
+
+            if request_id is not None:
+                await send_message(
+                    websocket,
+                    {
+                        "type": OutgoingEvent.EVENT_HANDLED,
+                        "event": event["type"],
+                        "requestId": request_id,
+                    },
+                )
 
         except EventError as error:
             await send_message(
                 websocket,
-                {
-                    "type": error.type,
-                    "error": str(error),
-                },
+                GlobalEventHandler.__error(error.type, error, request_id),
             )
         except Exception as error:
-            print(traceback.format_exc())
+            log.exception("❌ Handler of %s failed", Truncated(event))
             await send_message(
                 websocket,
-                {
-                    "type": ErrorEvent.GENERIC_ERROR,
-                    "error": str(error),
-                },
+                GlobalEventHandler.__error(ErrorEvent.GENERIC_ERROR, error, request_id),
             )
+
+    @staticmethod
+    def __error(
+        error_type: ErrorEvent, error: Exception, request_id: Union[str, int, None]
+    ) -> dict:
+        message = {
+            "type": error_type,
+            "error": str(error),
+        }
+        if request_id is not None:
+            message["requestId"] = request_id
+
+        return message
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import websockets
+
+from global_config import config
+from handlers.global_event_handler import GlobalEventHandler
+from utils.events import IncomingEvent, OutgoingEvent
+from utils.functions import send_message
+from utils.logger import get_logger
+from utils.metrics import LOOP_LAG, metrics
+
+log = get_logger("metrics")
+
+
+async def watch_metrics() -> None:
+    """
+    Periodically write every metric to the configured file in the Prometheus
+    text format, for a node exporter or scraper to pick up.
+    """
+
+    if config.metrics_file is None:
+        return
+
+    while True:
+        await asyncio.sleep(config.metrics_dump_interval)
+        try:
+            await asyncio.to_thread(metrics.dump, config.metrics_file)
+        except OSError as error:
+            log.warning("⚠️ Metrics not written: %s", error)
+
+
+async def watch_loop_lag() -> None:
+    """
+    Record how late the event loop wakes this task up, which is how long every
+    other event waits behind whatever blocks the loop.
+    """
+
+    while True:
+        expected = time.perf_counter() + config.loop_lag_interval
+        await asyncio.sleep(config.loop_lag_interval)
+        LOOP_LAG.observe(max(0.0, time.perf_counter() - expected))
+
+
+@GlobalEventHandler.register(IncomingEvent.METRICS_FETCH)
+async def handle_metrics_fetch(websocket: websockets.ServerConnection, _) -> None:
+    await send_message(
+        websocket,
+        {
+            "type": OutgoingEvent.METRICS_FETCHED,
+            "metrics": metrics.snapshot(),
+        },
+    )
@@ -1,31 +1,245 @@
 import asyncio
+import os
+from collections import Counter
 from pathlib import Path
+from stat import S_ISREG
+from typing import Coroutine, Union
 
 import websockets
 
-from database.models import Sound
+from audio.importer import SoundImporter
+from audio.mixer import PLAY_POLICIES
+from database.models import Sound, is_sound_path
 from database.services.sound import SoundService
+from global_config import config as global_config
 from handlers.global_event_handler import GlobalEventHandler
-from sound_controller import sound_controller
+from sound_controller import PlayOptions, sound_controller
 from utils.errors import (
+    InvalidSoundFileError,
     MissingFieldError,
+    SoundNotFoundError,
+    ValidationError,
 )
 from utils.events import IncomingEvent, OutgoingEvent
-from utils.functions import send_message
+from utils.functions import (
+    broadcast_message,
+    encode_message,
+    send_encoded,
+    send_message,
+)
+from utils.payload_cache import payload_cache
 
 sound_service = SoundService()
+sound_importer = SoundImporter(global_config.import_workers)
+background_tasks: set[asyncio.Task] = set()
+importing_sounds: set[int] = set()
+missing_sounds: set[int] = set()
+play_counts: Counter[int] = Counter()
+hot_sounds: set[int] = set()
+sound_timers: dict[str, asyncio.TimerHandle] = {}
+
+
+def run_in_background(coroutine: Coroutine) -> None:
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+async def import_sound(sound: dict) -> None:
+    """
+    Analyze a sound in the import worker pool, store its audio properties and
+    library file, and broadcast the updated sound. Sounds that fail to decode are
+    flagged as invalid.
+    """
+
+    if sound["id"] in importing_sounds:
+        return
+
+    library = (
+        (global_config.library_dir, global_config.samplerate, global_config.channels)
+        if global_config.library_enabled
+        else None
+    )
+
+    importing_sounds.add(sound["id"])
+    try:
+        metadata = await sound_importer.analyze(sound["path"], library)
+    finally:
+        importing_sounds.discard(sound["id"])
+
+    try:
+        if "error" in metadata:
+            updated_sound = await sound_service.set_is_valid(sound["id"], False)
+        else:
+            updated_sound = await sound_service.set_metadata(sound["id"], metadata)
+    except SoundNotFoundError:
+        if metadata.get("pcm_path") is not None:
+            await asyncio.to_thread(
+                sound_controller.library.remove, metadata["pcm_path"]
+            )
+        return
+
+    previous_pcm_path = sound.get("pcm_path")
+    if previous_pcm_path not in (None, updated_sound["pcm_path"]):
+        await asyncio.to_thread(sound_controller.library.remove, previous_pcm_path)
+
+    message = {"type": OutgoingEvent.SOUND_UPDATED, "sound": updated_sound}
+    if "error" in metadata:
+        message["error"] = metadata["error"]
+
+    broadcast_message(message, f"sound:{sound['id']}")
+
+    if sound["id"] in hot_sounds:
+        await refresh_hot_set()
+
+
+async def refresh_hot_set() -> None:
+    """
+    Preload the heads of the pinned sounds and of the most played ones, and drop
+    the heads of sounds that left the hot set.
+    """
+
+    sound_ids = [sound["id"] for sound in sound_service.get_all() if sound["pinned"]]
+    sound_ids += [
+        sound_id
+        for sound_id, _ in play_counts.most_common(
+            global_config.hot_set_size + len(sound_ids)
+        )
+        if sound_id not in sound_ids
+    ][: global_config.hot_set_size]
+
+    sounds = []
+    for sound_id in sound_ids:
+        try:
+            sound = sound_service.get(sound_id)
+        except SoundNotFoundError:
+            continue
+
+        if sound.is_valid:
+            sounds.append(sound)
+
+    hot_sounds.clear()
+    hot_sounds.update(sound.id for sound in sounds)
+    await sound_controller.preload_heads(sounds)
+
+
+def schedule_hot_set_refresh() -> None:
+    """
+    Refresh the hot set once the refresh delay has passed, so a burst of plays
+    and updates costs a single scan of the catalog.
+    """
+
+    if "hot_set" not in sound_timers:
+        sound_timers["hot_set"] = asyncio.get_running_loop().call_later(
+            global_config.hot_set_refresh_delay, start_hot_set_refresh
+        )
+
+
+def start_hot_set_refresh() -> None:
+    sound_timers.pop("hot_set", None)
+    run_in_background(refresh_hot_set())
+
+
+def validate_position(name: str, value: object) -> None:
+    if value is not None and (not isinstance(value, (int, float)) or value < 0):
+        raise ValidationError(f"{name.capitalize()} must be a non-negative number")
+
+
+def validate_play_options(event: dict, sound: Sound, policy: str) -> PlayOptions:
+    gain = event.get("gain", 1.0)
+    if not isinstance(gain, (int, float)) or gain < 0:
+        raise ValidationError("Gain must be a non-negative number")
 
+    start = event.get("start", sound.trim_start)
+    end = event.get("end", sound.trim_end)
+    validate_position("start", start)
+    validate_position("end", end)
+    if start is not None and end is not None and end <= start:
+        raise ValidationError("End must be after start")
 
-def update_sound_validity(sound: Sound, is_valid: bool) -> None:
-    sound.is_valid = is_valid
-    sound_service.set_is_valid(sound.id, is_valid)
+    if policy not in PLAY_POLICIES:
+        raise ValidationError(f"Policy must be one of {', '.join(PLAY_POLICIES)}")
 
+    priority = event.get("priority", sound.priority)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise ValidationError("Priority must be an integer")
 
-def build_sound_update_message(sound: Sound) -> dict:
-    return {
-        "type": OutgoingEvent.SOUND_UPDATED,
-        "sound": sound.model_dump(),
-    }
+    return PlayOptions(gain, start or 0.0, end, policy, priority)
+
+
+def broadcast_queue() -> None:
+    broadcast_message(
+        {"type": OutgoingEvent.QUEUE_UPDATED, "queue": sound_controller.queue()},
+        "queue",
+    )
+
+
+def check_files(paths: list[str]) -> list[Union[tuple[int, int], None]]:
+    """
+    Get the mtime and size of every file, or None for the files not found.
+    """
+
+    found = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            found.append(None)
+            continue
+
+        found.append(
+            (stat.st_mtime_ns, stat.st_size) if S_ISREG(stat.st_mode) else None
+        )
+
+    return found
+
+
+async def scan_sound_validity() -> None:
+    """
+    Check the file of every sound and flag the sounds whose file disappeared as
+    invalid, in a single transaction and a single broadcast. Sounds whose file
+    reappears, or changed since it was analyzed, are imported again, which marks
+    them as valid and transcodes them again once decoded.
+    """
+
+    sounds = sound_service.get_all()
+    found = await asyncio.to_thread(check_files, [sound["path"] for sound in sounds])
+
+    lost = {}
+    for sound, stat in zip(sounds, found):
+        if stat is not None:
+            if sound["id"] in missing_sounds:
+                missing_sounds.discard(sound["id"])
+                run_in_background(import_sound(sound))
+            elif sound["is_valid"] and stat != (
+                sound["source_mtime_ns"],
+                sound["source_size"],
+            ):
+                run_in_background(import_sound(sound))
+        else:
+            missing_sounds.add(sound["id"])
+            if sound["is_valid"]:
+                lost[sound["id"]] = False
+
+    if lost:
+        broadcast_message(
+            {
+                "type": OutgoingEvent.SOUND_BATCH_UPDATED,
+                "sounds": await sound_service.set_is_valid_many(lost),
+                "revision": sound_service.revision,
+            }
+        )
+
+
+async def watch_sound_validity() -> None:
+    """
+    Periodically scan the validity of every sound, so playing a sound never
+    waits on checking its file.
+    """
+
+    while True:
+        await scan_sound_validity()
+        await asyncio.sleep(global_config.validity_scan_interval)
 
 
 @GlobalEventHandler.register(IncomingEvent.SOUND_ADD)
@@ -34,12 +248,66 @@ async def handle_sound_add(websocket: websockets.ServerConnection, event: dict)
     if sound is None:
         raise MissingFieldError("data")
 
-    new_sound = sound_service.create(sound)
-    await send_message(
-        websocket,
-        {"type": OutgoingEvent.SOUND_ADDED, "sound": new_sound},
+    new_sound = await sound_service.create(sound)
+    broadcast_message({"type": OutgoingEvent.SOUND_ADDED, "sound": new_sound})
+
+    run_in_background(import_sound(new_sound))
+
+
+def scan_directory(directory: str, pattern: str, recursive: bool) -> list[dict]:
+    """
+    List the sound files in a directory matching a glob pattern, named after
+    their file names.
+    """
+
+    root = Path(directory)
+    if not root.is_dir():
+        raise ValidationError(f"Directory not found: {directory}")
+
+    paths = root.rglob(pattern) if recursive else root.glob(pattern)
+    return [
+        {"name": path.stem, "path": str(path)}
+        for path in sorted(paths)
+        if is_sound_path(path.name) and path.is_file()
+    ]
+
+
+async def import_sounds(sounds: list) -> None:
+    await asyncio.gather(*(import_sound(sound) for sound in sounds))
+
+
+@GlobalEventHandler.register(IncomingEvent.SOUND_ADD_BATCH)
+async def handle_sound_add_batch(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    sounds = event.get("data", None)
+    directory = event.get("directory", None)
+
+    if directory is not None:
+        pattern = event.get("pattern", "*")
+        recursive = event.get("recursive", False)
+        if not isinstance(pattern, str) or not isinstance(recursive, bool):
+            raise ValidationError("Pattern must be a string and recursive a boolean")
+
+        sounds = await asyncio.to_thread(scan_directory, directory, pattern, recursive)
+    elif sounds is None:
+        raise MissingFieldError("data")
+    elif not isinstance(sounds, list):
+        raise ValidationError("Data must be a list of sounds")
+
+    new_sounds, errors = await sound_service.create_many(sounds)
+    broadcast_message(
+        {
+            "type": OutgoingEvent.SOUND_BATCH_ADDED,
+            "created": [sound["id"] for sound in new_sounds],
+            "errors": errors,
+            "revision": sound_service.revision,
+        }
     )
 
+    if new_sounds:
+        run_in_background(import_sounds(new_sounds))
+
 
 @GlobalEventHandler.register(IncomingEvent.SOUND_UPDATE)
 async def handle_sound_update(
@@ -49,12 +317,32 @@ async def handle_sound_update(
     if sound is None:
         raise MissingFieldError("data")
 
-    updated_sound = sound_service.update(sound["id"], sound)
-    await send_message(
-        websocket,
+    previous_sound = sound_service.get(sound["id"])
+    updated_sound = await sound_service.update(sound["id"], sound)
+
+    path_changed = updated_sound["path"] != previous_sound.path
+    if path_changed:
+        sound_controller.forget(previous_sound)
+
+    if path_changed and previous_sound.pcm_path is not None:
+        updated_sound = await sound_service.set_pcm_path(sound["id"], None)
+        await asyncio.to_thread(
+            sound_controller.library.remove, previous_sound.pcm_path
+        )
+
+    broadcast_message(
         {"type": OutgoingEvent.SOUND_UPDATED, "sound": updated_sound},
+        f"sound:{updated_sound['id']}",
     )
 
+    if path_changed:
+        run_in_background(import_sound(updated_sound))
+
+    if updated_sound["pinned"] != previous_sound.pinned or (
+        updated_sound["id"] in hot_sounds
+    ):
+        schedule_hot_set_refresh()
+
 
 @GlobalEventHandler.register(IncomingEvent.SOUND_REMOVE)
 async def handle_sound_remove(
@@ -64,10 +352,14 @@ async def handle_sound_remove(
     if sound_id is None:
         raise MissingFieldError("soundId")
 
-    sound_service.delete(sound_id)
-    await send_message(
-        websocket,
+    removed_sound = await sound_service.delete(sound_id)
+    sound_controller.forget(removed_sound)
+    if removed_sound.pcm_path is not None:
+        await asyncio.to_thread(sound_controller.library.remove, removed_sound.pcm_path)
+
+    broadcast_message(
         {"type": OutgoingEvent.SOUND_REMOVED, "soundId": sound_id},
+        f"sound:{sound_id}",
     )
 
 
@@ -75,38 +367,185 @@ async def handle_sound_remove(
 async def handle_sound_fetch(
     websocket: websockets.ServerConnection, event: dict
 ) -> None:
-    sounds = sound_service.get_all()
+    cursor = event.get("cursor", None)
+    limit = event.get("limit", None)
+    since = event.get("since", None)
+
+    for name, value in (("cursor", cursor), ("since", since)):
+        if value is not None and not isinstance(value, int):
+            raise ValidationError(f"{name.capitalize()} must be an integer")
+
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValidationError("Limit must be a positive integer")
+
+    if cursor is None and limit is None and since is None:
+        revision = sound_service.revision
+        payload = payload_cache.get("sounds", revision)
+        if payload is None:
+            payload = payload_cache.put(
+                "sounds",
+                encode_message(
+                    {
+                        "type": OutgoingEvent.SOUND_FETCHED,
+                        "sounds": sound_service.get_all(),
+                        "revision": revision,
+                    }
+                ),
+                revision,
+            )
+
+        await send_encoded(websocket, payload)
+        return
+
+    limit = limit or global_config.sound_fetch_limit
+
+    if since is not None:
+        changes = sound_service.changes(since, limit)
+        if changes is not None:
+            await send_message(
+                websocket,
+                {
+                    "type": OutgoingEvent.SOUND_FETCHED,
+                    "sounds": changes.sounds,
+                    "removed": changes.removed,
+                    "revision": changes.revision,
+                    "hasMore": changes.has_more,
+                },
+            )
+            return
+
+    page = sound_service.page(cursor, limit)
     await send_message(
         websocket,
-        {"type": OutgoingEvent.SOUND_FETCHED, "sounds": sounds},
+        {
+            "type": OutgoingEvent.SOUND_FETCHED,
+            "sounds": page.sounds,
+            "revision": page.revision,
+            "nextCursor": page.next_cursor,
+            "reset": since is not None,
+        },
     )
 
 
-@GlobalEventHandler.register(IncomingEvent.SOUND_PLAY)
-async def handle_sound_play(
-    websocket: websockets.ServerConnection, event: dict
+async def play_sound(
+    websocket: websockets.ServerConnection, event: dict, policy: str
 ) -> None:
     sound_id = event.get("soundId", None)
     if sound_id is None:
         raise MissingFieldError("soundId")
 
     sound = sound_service.get(sound_id)
-    if Path(sound.path).is_file():
-        if not sound.is_valid:
-            update_sound_validity(sound, True)
-            await send_message(websocket, build_sound_update_message(sound))
-    else:
-        if sound.is_valid:
-            update_sound_validity(sound, False)
-            await send_message(websocket, build_sound_update_message(sound))
+    options = validate_play_options(event, sound, policy)
+
+    if not sound.is_valid:
+        # The file may be back since it was flagged, so it is checked again, but
+        # the client is told right away that nothing plays.
+        run_in_background(import_sound(sound.model_dump()))
+        raise InvalidSoundFileError(sound.path)
 
+    try:
+        status, voice, affected = await sound_controller.play_sound(
+            sound, asyncio.get_running_loop(), options
+        )
+    except InvalidSoundFileError:
+        missing_sounds.add(sound.id)
+        broadcast_message(
+            {
+                "type": OutgoingEvent.SOUND_UPDATED,
+                "sound": await sound_service.set_is_valid(sound.id, False),
+            },
+            f"sound:{sound.id}",
+        )
+        raise
+
+    if status == "ignored":
+        await send_message(
+            websocket,
+            {"type": OutgoingEvent.SOUND_IGNORED, "soundId": sound.id},
+        )
         return
 
-    await sound_controller.play_sound(
-        sound.path, sound_id, websocket, asyncio.get_event_loop()
-    )
+    if status == "queued":
+        broadcast_queue()
+    elif status == "restarted":
+        broadcast_message(
+            {
+                "type": OutgoingEvent.SOUND_SEEKED,
+                "voiceIds": [other.id for other in affected],
+                "position": round(voice.elapsed, 3),
+            }
+        )
+
+    play_counts[sound.id] += 1
+    if sound.id not in hot_sounds:
+        schedule_hot_set_refresh()
+
+    if sound.duration is None or (
+        global_config.library_enabled and sound.pcm_path is None
+    ):
+        run_in_background(import_sound(sound.model_dump()))
+
+
+@GlobalEventHandler.register(IncomingEvent.SOUND_PLAY)
+async def handle_sound_play(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    await play_sound(websocket, event, event.get("policy", global_config.play_policy))
+
+
+@GlobalEventHandler.register(IncomingEvent.SOUND_ENQUEUE)
+async def handle_sound_enqueue(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    await play_sound(websocket, event, "queue")
 
 
 @GlobalEventHandler.register(IncomingEvent.SOUND_STOP)
-async def handle_sound_stop(websocket: websockets.ServerConnection, _) -> None:
-    sound_controller.stop_sound()
+async def handle_sound_stop(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    if await sound_controller.stop_sound(
+        event.get("soundId", None), event.get("voiceId", None)
+    ):
+        broadcast_queue()
+
+
+@GlobalEventHandler.register(IncomingEvent.SOUND_SEEK)
+async def handle_sound_seek(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    position = event.get("position", None)
+    if position is None:
+        raise MissingFieldError("position")
+
+    validate_position("position", position)
+
+    voice_ids = await sound_controller.seek_sound(
+        position, event.get("soundId", None), event.get("voiceId", None)
+    )
+    if voice_ids:
+        broadcast_message(
+            {
+                "type": OutgoingEvent.SOUND_SEEKED,
+                "voiceIds": voice_ids,
+                "position": position,
+            }
+        )
+
+
+@GlobalEventHandler.register(IncomingEvent.QUEUE_FETCH)
+async def handle_queue_fetch(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    await send_message(
+        websocket,
+        {"type": OutgoingEvent.QUEUE_FETCHED, "queue": sound_controller.queue()},
+    )
+
+
+@GlobalEventHandler.register(IncomingEvent.QUEUE_CLEAR)
+async def handle_queue_clear(
+    websocket: websockets.ServerConnection, event: dict
+) -> None:
+    if await sound_controller.clear_queue():
+        broadcast_queue()
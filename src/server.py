@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import websockets
+
+from database.sqlite import sqlite
+from global_config import config, config_service
+from handlers.global_event_handler import GlobalEventHandler
+from handlers.metrics_handler import watch_loop_lag, watch_metrics
+from handlers.sound_handler import (
+    refresh_hot_set,
+    run_in_background,
+    sound_importer,
+    watch_sound_validity,
+)
+from sound_controller import sound_controller
+from utils.errors import EventError
+from utils.functions import client_registry
+from utils.logger import Truncated, get_logger
+from utils.serializer import serializer
+
+log = get_logger("server")
+event_log = get_logger("events")
+
+
+async def echo(websocket: websockets.ServerConnection):
+    """
+    Handle incoming websocket connections and events.
+    This function receives events from the websocket and processes them using the global event handler.
+
+    :param websocket: The websocket connection to handle.
+    """
+
+    client_registry.add(websocket, config.client_queue_size, config.client_max_pending)
+    log.info("🔌 Client connected (%d connected)", len(client_registry))
+
+    try:
+        while True:
+            event = await websocket.recv()
+            received_at = time.perf_counter()
+            event_log.debug("📫 Received event: %s", Truncated(event))
+
+            await GlobalEventHandler.handle_event(
+                websocket, serializer.decode(event), received_at
+            )
+    except websockets.ConnectionClosed:
+        log.info("❌ Connection closed")
+    finally:
+        client_registry.remove(websocket)
+
+
+async def main():
+    try:
+        await sound_controller.start()
+        log.info("🔊 Output streams opened")
+    except EventError as error:
+        log.warning("⚠️ Output streams not opened: %s", error)
+
+    run_in_background(refresh_hot_set())
+
+    device_watcher = asyncio.create_task(sound_controller.watch_devices())
+    validity_watcher = asyncio.create_task(watch_sound_validity())
+    progress_watcher = asyncio.create_task(sound_controller.watch_progress())
+    metrics_watcher = asyncio.create_task(watch_metrics())
+    loop_lag_watcher = asyncio.create_task(watch_loop_lag())
+
+    try:
+        async with websockets.serve(echo, config.host, config.port) as server:
+            log.info("🚀 Server started on ws://%s:%d", config.host, config.port)
+            await server.serve_forever()
+    finally:
+        device_watcher.cancel()
+        validity_watcher.cancel()
+        progress_watcher.cancel()
+        metrics_watcher.cancel()
+        loop_lag_watcher.cancel()
+        sound_importer.shutdown()
+        sound_controller.close()
+        config_service.persist_blocking()
+        sqlite.close()
@@ -1,173 +1,502 @@
 import asyncio
+import os
 import threading
-from typing import Union
-
-import sounddevice as sd
-import soundfile as sf
-import websockets
-
+import time
+from functools import partial
+from typing import Any, Callable, NamedTuple, Union
+
+from audio.backends import OutputBackend, create_backend
+from audio.head_cache import HeadCache, decode_head
+from audio.library import SoundLibrary
+from audio.mixer import Mixer, Voice
+from audio.pcm_cache import DecodedSound, PCMCache
+from database.models import Sound
 from global_config import config
-from utils.errors import (
-    PlaybackDeviceAmbiguousError,
-    PlaybackDeviceNotFoundError,
-)
+from utils.errors import EventError, InvalidSoundFileError
 from utils.events import OutgoingEvent
-from utils.functions import send_message
+from utils.functions import broadcast_message
+from utils.logger import get_logger
+from utils.metrics import SOUND_LOAD
+
+log = get_logger("audio")
+
+
+class PlayOptions(NamedTuple):
+    """
+    How a voice is played and scheduled against the voices already playing.
+    """
+
+    gain: float = 1.0
+    start: float = 0.0
+    end: Union[float, None] = None
+    policy: str = "mix"
+    priority: int = 0
 
 
 class SoundController:
     """
     Singleton class to manage sound playback using SoundDevice and SoundFile.
     This class is responsible for playing sound files and managing the playback thread.
+    Decoded sounds are kept in a PCM cache so replaying a sound skips the decode.
+    Sounds in the hot set also keep their head decoded, so they start instantly
+    while the rest of the sound loads behind the head.
+
+    Every play adds a voice to a mixer that is rendered by a long-lived playback
+    thread, so overlapping sounds are mixed together instead of restarting playback.
+    The mixer also owns the play queue, so a queued sound starts on the frame the
+    previous one ends on, without a round trip through the event loop.
+
+    The playback thread hands the mix to the configured output backend: PortAudio
+    streams, a null sink or a WAV file. Outputs stay open at the configured sample
+    rate and channel layout; voices are converted to that format as they are mixed.
+
+    The event loop never waits on the playback thread: plays, stops and seeks are
+    posted to the mixer as commands that the playback thread runs before its next
+    block, and their results come back to the loop as futures. Device queries and
+    thread joins run in worker threads.
     """
 
     _instance: Union["SoundController", None] = None
 
     _stop_event: Union[threading.Event, None] = threading.Event()
     _playback_thread: Union[threading.Thread, None] = None
+    _pipeline_lock: asyncio.Lock = asyncio.Lock()
+
+    _pcm_cache: PCMCache = PCMCache(config.pcm_cache_size)
+    _head_cache: HeadCache = HeadCache()
+    _loading: set[asyncio.Task] = set()
+    _library: SoundLibrary = SoundLibrary(
+        config.library_dir, config.samplerate, config.channels
+    )
+    _mixer: Mixer = Mixer(
+        config.channels, config.max_voices, config.voice_steal_policy, config.max_queued
+    )
 
-    _sound_file: Union[sf.SoundFile, None] = None
-    _streamed: int = 0
+    _backend: OutputBackend = create_backend(config.audio_backend)
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SoundController, cls).__new__(cls)
         return cls._instance
 
-    def stop_sound(self):
+    async def start(self) -> None:
         """
-        Stop the currently playing sound and close the playback thread.
+        Open the outputs of the backend ahead of the first play, so the first
+        trigger is as fast as later ones.
         """
 
-        self._streamed = 0
-        self._stop_event.set()
+        if self.running:
+            return
 
-        if self._playback_thread and self._playback_thread.is_alive():
-            self._playback_thread.join()
-
-        if self._sound_file is not None:
-            self._sound_file.close()
-            self._sound_file = None
+        async with self._pipeline_lock:
+            await self.__start()
 
-    async def play_sound(
-        self,
-        sound_path: str,
-        sound_id: int,
-        websocket: websockets.ServerConnection,
-        loop: asyncio.AbstractEventLoop,
-    ):
-        """
-        Play a sound file using SoundDevice and SoundFile.
-        This method will stop any currently playing sound before starting a new one.
+    async def __start(self) -> None:
+        # Starts, restarts and device refreshes hold the pipeline lock, so calls
+        # racing across the awaits below never start a second playback thread.
+        if self.running:
+            return
 
-        :param sound_path: Path to the sound file to be played.
-        :param sound_id: ID of the sound being played.
-        :param websocket: Websocket connection to send messages to.
-        :param loop: The asyncio event loop to run the coroutine in.
-        """
+        await asyncio.to_thread(self._backend.open)
 
-        self.stop_sound()
         self._stop_event.clear()
-
-        playback_device = await self.__get_playback_device()
         self._playback_thread = threading.Thread(
-            target=self.__play_sound,
-            args=(playback_device, sound_path, sound_id, websocket, loop),
+            target=self.__run_pipeline, daemon=True
         )
         self._playback_thread.start()
 
-    def __play_sound(
-        self,
-        device_id: int,
-        sound_path: str,
-        sound_id: int,
-        websocket: websockets.ServerConnection,
-        loop: asyncio.AbstractEventLoop,
-    ):
-        self._sound_file = sf.SoundFile(sound_path)
-
-        input_stream = sd.OutputStream(
-            blocksize=config.chunk_size,
-            samplerate=self._sound_file.samplerate,
-            channels=self._sound_file.channels,
-            dtype="float32",
-        )
-        output_stream = sd.OutputStream(
-            device=device_id,
-            blocksize=config.chunk_size,
-            samplerate=self._sound_file.samplerate,
-            channels=self._sound_file.channels,
-            dtype="float32",
-        )
+    @property
+    def running(self) -> bool:
+        return self._playback_thread is not None and self._playback_thread.is_alive()
+
+    @property
+    def playback_device(self) -> Union[dict, None]:
+        return self._backend.device
 
-        input_stream.start()
-        output_stream.start()
+    @property
+    def library(self) -> SoundLibrary:
+        return self._library
+
+    async def restart(self) -> None:
+        """
+        Restart the playback thread, reopening only the streams whose device or
+        format changed. Playing voices are kept.
+        """
 
-        asyncio.run_coroutine_threadsafe(
-            send_message(
-                websocket,
+        async with self._pipeline_lock:
+            await asyncio.to_thread(self.__stop_pipeline)
+            await self.__start()
+
+    async def refresh_devices(self) -> None:
+        """
+        Enumerate devices again and reopen the output streams on the device that
+        matches the configured rules. Playing voices are kept.
+        """
+
+        async with self._pipeline_lock:
+            await asyncio.to_thread(self.__stop_pipeline)
+            await asyncio.to_thread(self._backend.reinitialize)
+            await self.__start()
+
+    async def watch_devices(self) -> None:
+        """
+        Periodically refresh the devices while the playback device is missing or
+        its outputs stopped delivering audio, so a device plugged in after
+        startup, or unplugged during playback, is picked up without a restart.
+        """
+
+        while True:
+            await asyncio.sleep(config.device_refresh_interval)
+            if self.running and self._backend.active:
+                continue
+
+            if self.running:
+                log.warning("🔊 Playback device lost, reopening the outputs")
+
+            try:
+                await self.refresh_devices()
+                log.info("🔊 Playback device found: %s", self.playback_device["name"])
+            except EventError:
+                pass
+
+    async def watch_progress(self) -> None:
+        """
+        Broadcast the position of every playing voice at the progress rate.
+        Positions are read from the loop, so the audio thread never sends
+        anything, and each client only keeps the latest report queued.
+        """
+
+        if config.progress_rate <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(1 / config.progress_rate)
+
+            voices = self._mixer.voices
+            if not voices:
+                continue
+
+            broadcast_message(
                 {
-                    "type": OutgoingEvent.SOUND_PLAYING,
-                    "soundId": sound_id,
+                    "type": OutgoingEvent.SOUND_PROGRESS,
+                    "voices": [
+                        {
+                            "soundId": voice.sound_id,
+                            "voiceId": voice.id,
+                            "position": round(voice.elapsed, 3),
+                            "duration": round(voice.duration, 3),
+                        }
+                        for voice in voices
+                    ],
                 },
-            ),
-            loop,
+                "progress",
+                droppable=True,
+            )
+
+    def close(self) -> None:
+        """
+        Stop every voice, the playback thread and close the output streams.
+        """
+
+        self.__stop_pipeline()
+        self._mixer.remove()
+        self._mixer.dequeue()
+        self._backend.close()
+
+    async def stop_sound(
+        self, sound_id: Union[int, None] = None, voice_id: Union[int, None] = None
+    ) -> bool:
+        """
+        Stop playing and queued voices. Without filters, every voice is stopped
+        and the queue is cleared. Returns whether the queue changed.
+
+        :param sound_id: Only stop voices of this sound.
+        :param voice_id: Only stop the voice with this ID.
+        """
+
+        return await self.__command(partial(self.__stop, voice_id, sound_id))
+
+    def queue(self) -> list[dict]:
+        """
+        Get the queued voices, in the order they will start.
+        """
+
+        return [
+            {"voiceId": voice.id, "soundId": voice.sound_id, "priority": voice.priority}
+            for voice in self._mixer.queued
+        ]
+
+    async def clear_queue(self) -> list[int]:
+        """
+        Remove every queued voice. Returns the IDs of the removed voices.
+        """
+
+        return [voice.id for voice in await self.__command(self._mixer.dequeue)]
+
+    async def seek_sound(
+        self,
+        position: float,
+        sound_id: Union[int, None] = None,
+        voice_id: Union[int, None] = None,
+    ) -> list[int]:
+        """
+        Move the playback position of playing voices. Without filters, every
+        voice is moved. Returns the IDs of the moved voices.
+
+        :param position: Position in seconds from the start of the sound.
+        :param sound_id: Only move voices playing this sound.
+        :param voice_id: Only move the voice with this ID.
+        """
+
+        voices = await self.__command(
+            partial(self._mixer.seek, position, voice_id=voice_id, sound_id=sound_id)
         )
+        return [voice.id for voice in voices]
+
+    def cache_stats(self) -> dict:
+        """
+        Get the hit, miss and eviction counters of the PCM cache.
+        """
+
+        return {**self._pcm_cache.stats(), "heads": self._head_cache.stats()}
+
+    def forget(self, sound: Sound) -> None:
+        """
+        Drop the decoded PCM of a sound file that is no longer used by the sound.
 
-        self._streamed = 0
-        while self._streamed + config.chunk_size < len(self._sound_file):
-            if self._stop_event.is_set():
-                break
+        :param sound: The sound record, as it was before the change.
+        """
+
+        self._pcm_cache.invalidate(sound.path)
 
-            chunk = self._sound_file.read(config.chunk_size, dtype="float32")
+    async def preload_heads(self, sounds: list[Sound]) -> None:
+        """
+        Make the given sounds the hot set: decode the heads missing from the head
+        cache and drop the heads of sounds no longer in the set.
 
-            input_stream.write(
-                chunk * (config.headphone_volume if not config.headphone_muted else 0)
+        :param sounds: The sound records of the hot set.
+        """
+
+        self._head_cache.retain({sound.id for sound in sounds})
+
+        # Heads of sounds whose file changed since they were analyzed would play
+        # the old audio, so they wait until the sound is imported again.
+        changed = await asyncio.to_thread(
+            lambda: {sound.id for sound in sounds if self.__source_changed(sound)}
+        )
+
+        for sound in sounds:
+            if sound.id in changed:
+                self._head_cache.remove(sound.id)
+                continue
+
+            seconds = (sound.head_ms or config.head_ms) / 1000
+            key = (
+                sound.pcm_path or sound.path,
+                sound.source_mtime_ns,
+                sound.source_size,
+                seconds,
             )
-            output_stream.write(chunk * config.microphone_volume)
+            if self._head_cache.has(sound.id, key):
+                continue
+
+            try:
+                head = await asyncio.to_thread(
+                    decode_head, sound.path, sound.pcm_path, self._library, seconds
+                )
+            except (OSError, RuntimeError):
+                continue
+
+            self._head_cache.put(sound.id, key, head)
+
+    async def play_sound(
+        self,
+        sound: Sound,
+        loop: asyncio.AbstractEventLoop,
+        options: PlayOptions = PlayOptions(),
+    ) -> tuple[str, Voice, list[Voice]]:
+        """
+        Play a sound file using SoundDevice and SoundFile.
+        The sound is added as a new voice and scheduled by the mixer according to
+        the play policy. Sounds transcoded into the library are memory-mapped
+        instead of decoded, so starting at an offset costs the same as starting
+        at zero. A preloaded head is only used while the sound file is unchanged
+        since it was analyzed.
+
+        Returns what happened to the voice ("playing", "queued", "ignored" or
+        "restarted"), the voice, and the voices it stopped or restarted.
+
+        :param sound: The sound record to be played.
+        :param loop: The asyncio event loop to broadcast playback events from.
+        :param options: Gain, range, play policy and priority of the voice.
+        """
+
+        triggered_at = time.perf_counter()
+        await self.start()
 
-            self._streamed += config.chunk_size
+        head = self._head_cache.get(sound.id)
+        if head is not None and self.__source_changed(sound):
+            self._head_cache.remove(sound.id)
+            head = None
+        elif head is not None and options.start * head.samplerate >= len(head.frames):
+            head = None
 
-        self._sound_file = None
-        self._streamed = 0
+        pcm = head
+        if head is None:
+            started = time.perf_counter()
+            pcm = await asyncio.to_thread(self.__load, sound)
+            SOUND_LOAD.observe(time.perf_counter() - started)
 
-        input_stream.close()
-        output_stream.close()
+        def on_start(voice: Voice) -> None:
+            loop.call_soon_threadsafe(self.__broadcast_start, voice)
 
-        asyncio.run_coroutine_threadsafe(
-            send_message(
-                websocket,
+        def on_end(voice: Voice) -> None:
+            loop.call_soon_threadsafe(
+                broadcast_message,
                 {
                     "type": OutgoingEvent.SOUND_STOPPED,
-                    "soundId": sound_id,
+                    "soundId": voice.sound_id,
+                    "voiceId": voice.id,
                 },
-            ),
-            loop,
-        )
+            )
 
-    async def __get_playback_device(self) -> int:
-        """
-        Get the device ID of the Input device.
-        """
+        voice = Voice(sound.id, pcm, config.samplerate, options.gain, on_end)
+        voice.priority = options.priority
+        voice.on_start = on_start
+        voice.triggered_at = triggered_at
+        voice.pending = head is not None
+        voice.expected_duration = sound.duration
+        voice.trim(options.end)
+        voice.seek(options.start)
+        status, affected = await self.__command(
+            partial(self._mixer.play, voice, options.policy)
+        )
 
-        devices = sd.query_devices()
+        if head is not None and status in ("playing", "queued"):
+            task = asyncio.create_task(self.__load_behind(sound, voice, head))
+            self._loading.add(task)
+            task.add_done_callback(self._loading.discard)
 
-        voicemeeter_playback = [
-            device["index"]
-            for device in devices
-            if "voicemeeter input (vb-audio voi" in device["name"].lower()
-            and device["hostapi"] == 0
-        ]
+        return status, voice, affected
 
-        if not voicemeeter_playback:
-            raise PlaybackDeviceNotFoundError("Voicemeeter Input device not found")
+    def __broadcast_start(self, voice: Voice) -> None:
+        broadcast_message(
+            {
+                "type": OutgoingEvent.SOUND_PLAYING,
+                "soundId": voice.sound_id,
+                "voiceId": voice.id,
+            }
+        )
+        if voice.queued:
+            broadcast_message(
+                {"type": OutgoingEvent.QUEUE_UPDATED, "queue": self.queue()}, "queue"
+            )
 
-        if len(voicemeeter_playback) > 1:
-            raise PlaybackDeviceAmbiguousError(
-                "Multiple Voicemeeter Input devices found"
+    async def __load_behind(
+        self, sound: Sound, voice: Voice, head: DecodedSound
+    ) -> None:
+        try:
+            pcm = await asyncio.to_thread(self.__load, sound, True)
+        except InvalidSoundFileError:
+            self._head_cache.remove(sound.id)
+            await self.__drop(voice)
+            return
+
+        if pcm.samplerate == head.samplerate and pcm.channels == head.channels:
+            await self.__command(partial(self._mixer.extend, voice, pcm))
+            return
+
+        # The head came from a library file that is gone, and the sound file it
+        # falls back to has another format, so the voice can not continue.
+        self._head_cache.remove(sound.id)
+        await self.__drop(voice)
+
+    async def __drop(self, voice: Voice) -> None:
+        if await self.__command(partial(self.__stop, voice.id, None)):
+            broadcast_message(
+                {"type": OutgoingEvent.QUEUE_UPDATED, "queue": self.queue()}, "queue"
             )
 
-        return voicemeeter_playback[0]
+    def __stop(self, voice_id: Union[int, None], sound_id: Union[int, None]) -> bool:
+        self._mixer.remove(voice_id=voice_id, sound_id=sound_id)
+        return bool(self._mixer.dequeue(voice_id=voice_id, sound_id=sound_id))
+
+    async def __command(self, command: Callable[[], Any]) -> Any:
+        if not self.running:
+            return command()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def done(result: Any, error: Union[Exception, None]) -> None:
+            loop.call_soon_threadsafe(self.__resolve, future, result, error)
+
+        self._mixer.post(command, done)
+        return await future
+
+    @staticmethod
+    def __resolve(
+        future: asyncio.Future, result: Any, error: Union[Exception, None]
+    ) -> None:
+        if future.done():
+            return
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def __load(self, sound: Sound, prefault: bool = False) -> DecodedSound:
+        if sound.pcm_path is not None and self.__source_changed(sound):
+            # The library file and head hold the audio of the file as it was
+            # analyzed. The PCM cache decodes the file as it is now, until the
+            # validity scan imports the sound again.
+            self._head_cache.remove(sound.id)
+        elif sound.pcm_path is not None:
+            try:
+                pcm = self._library.load(sound.pcm_path)
+                if prefault:
+                    # Read one sample per page, so the playback thread does not
+                    # fault the pages in once the head runs out.
+                    pcm.frames[:: max(1, 4096 // pcm.frames.strides[0])].sum()
+                return pcm
+            except (OSError, ValueError):
+                pass
+
+        try:
+            return self._pcm_cache.get(sound.path)
+        except (OSError, RuntimeError):
+            raise InvalidSoundFileError(sound.path)
+
+    @staticmethod
+    def __source_changed(sound: Sound) -> bool:
+        if sound.source_mtime_ns is None:
+            return False
+
+        try:
+            stat = os.stat(sound.path)
+        except OSError:
+            return False
+
+        return (stat.st_mtime_ns, stat.st_size) != (
+            sound.source_mtime_ns,
+            sound.source_size,
+        )
+
+    def __stop_pipeline(self) -> None:
+        self._stop_event.set()
+
+        if self._playback_thread and self._playback_thread.is_alive():
+            self._playback_thread.join()
+
+        # Commands posted while the thread was stopping would otherwise never run.
+        self._mixer.run_commands()
+
+    def __run_pipeline(self) -> None:
+        try:
+            self._backend.run(self._mixer, self._stop_event)
+        finally:
+            self._mixer.run_commands()
 
 
 sound_controller = SoundController()
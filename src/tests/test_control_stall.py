@@ -0,0 +1,39 @@
+"""
+Event-loop stall SLO of the SOUND:PLAY and SOUND:STOP handlers.
+
+Run from the src directory with: python -m unittest tests.test_control_stall
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+SLO_MS = 1.0
+
+directory = None
+
+
+def setUpModule() -> None:
+    global directory
+
+    # The config and sounds are read from a database in the working directory,
+    # created when the handlers are first imported.
+    directory = tempfile.mkdtemp(prefix="zound-test-")
+    os.chdir(directory)
+    os.environ["ZOUND_AUDIO_BACKEND"] = "null"
+
+
+class ControlStallTest(unittest.TestCase):
+    def test_handlers_stall_loop_under_slo(self) -> None:
+        from benchmarks.control_stall import run
+
+        results = asyncio.run(run(directory, voices=6, plays=100))
+
+        for name in ("sound_play", "sound_stop"):
+            with self.subTest(handler=name):
+                self.assertLessEqual(results[name]["max_call_ms"], SLO_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
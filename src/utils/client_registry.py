@@ -0,0 +1,226 @@
+import asyncio
+from collections import deque
+from typing import Union
+
+import websockets
+
+from utils.logger import get_logger
+
+log = get_logger("server")
+
+
+class Client:
+    """
+    A connected client and its bounded queue of outgoing messages.
+
+    Messages are sent by a writer task, so a slow client only delays its own
+    queue. Droppable messages, transient reports such as playback progress, are
+    dropped oldest first once the queue is full. A message with a coalesce key
+    removes the queued message with the same key and is queued last, so messages
+    are still delivered in the order they were produced. State changes and replies
+    to the client's own requests are never dropped. A client whose queue reaches
+    the pending limit anyway is disconnected, and resyncs with SOUND:FETCH since
+    the last revision it saw once it reconnects.
+    """
+
+    def __init__(
+        self, websocket: websockets.ServerConnection, max_size: int, max_pending: int
+    ) -> None:
+        """
+        Initialize the client and start its writer task.
+
+        :param websocket: The websocket connection of the client.
+        :param max_size: Maximum number of queued droppable messages.
+        :param max_pending: Maximum number of queued messages before the client
+            is disconnected.
+        """
+
+        self.websocket = websocket
+        self.dropped = 0
+        self.coalesced = 0
+        self.overflowed = False
+
+        self._max_size = max_size
+        self._max_pending = max_pending
+        self._queue: deque[list] = deque()
+        self._keys: dict[str, list] = {}
+        self._droppable = 0
+        self._ready = asyncio.Event()
+        self._writer = asyncio.create_task(self.__write())
+        self._closer: Union[asyncio.Task, None] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of queued messages.
+        """
+
+        return len(self._queue)
+
+    def send(
+        self,
+        payload: bytes,
+        droppable: bool = False,
+        coalesce_key: Union[str, None] = None,
+    ) -> None:
+        """
+        Queue an encoded message. Messages to a client that overflowed its queue
+        are discarded until it disconnects.
+
+        :param payload: The UTF-8 JSON encoded message.
+        :param droppable: Whether the message may be dropped when the queue is full.
+        :param coalesce_key: Key of a message that supersedes queued messages with
+            the same key.
+        """
+
+        if self.overflowed:
+            return
+
+        if coalesce_key is not None:
+            entry = self._keys.get(coalesce_key)
+            if entry is not None:
+                self._queue.remove(entry)
+                self.__forget(entry)
+                self.coalesced += 1
+
+        if len(self._queue) >= self._max_pending:
+            self.__overflow()
+            return
+
+        if droppable:
+            if self._droppable >= self._max_size:
+                self.__drop_oldest()
+            self._droppable += 1
+
+        entry = [payload, droppable, coalesce_key]
+        self._queue.append(entry)
+        if coalesce_key is not None:
+            self._keys[coalesce_key] = entry
+
+        self._ready.set()
+
+    def close(self) -> None:
+        """
+        Stop the writer task, discarding queued messages.
+        """
+
+        self._writer.cancel()
+        self._queue.clear()
+        self._keys.clear()
+        self._droppable = 0
+
+    def __overflow(self) -> None:
+        log.warning(
+            "⚠️ Client fell %d messages behind, disconnecting it", len(self._queue)
+        )
+        self.overflowed = True
+        self.close()
+        self._closer = asyncio.create_task(
+            self.websocket.close(1013, "Too far behind, fetch the sounds again")
+        )
+
+    def __drop_oldest(self) -> None:
+        for entry in self._queue:
+            if entry[1]:
+                self._queue.remove(entry)
+                self.__forget(entry)
+                self.dropped += 1
+                return
+
+    def __forget(self, entry: list) -> None:
+        if entry[1]:
+            self._droppable -= 1
+        if entry[2] is not None:
+            self._keys.pop(entry[2], None)
+
+    async def __write(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                while self._queue:
+                    entry = self._queue.popleft()
+                    self.__forget(entry)
+                    await self.websocket.send(entry[0], text=True)
+
+                self._ready.clear()
+        except websockets.ConnectionClosed:
+            pass
+
+
+class ClientRegistry:
+    """
+    Registry of the connected clients, used to reply to one client or broadcast
+    state changes to all of them.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[websockets.ServerConnection, Client] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @property
+    def clients(self) -> list[Client]:
+        """
+        The connected clients.
+        """
+
+        return list(self._clients.values())
+
+    def add(
+        self,
+        websocket: websockets.ServerConnection,
+        max_queue_size: int,
+        max_pending: int,
+    ) -> Client:
+        """
+        Register a connected client.
+
+        :param websocket: The websocket connection of the client.
+        :param max_queue_size: Maximum number of queued droppable messages.
+        :param max_pending: Maximum number of queued messages before the client
+            is disconnected.
+        """
+
+        client = Client(websocket, max_queue_size, max_pending)
+        self._clients[websocket] = client
+        return client
+
+    def remove(self, websocket: websockets.ServerConnection) -> None:
+        """
+        Unregister a disconnected client.
+
+        :param websocket: The websocket connection of the client.
+        """
+
+        client = self._clients.pop(websocket, None)
+        if client is not None:
+            client.close()
+
+    def get(self, websocket: websockets.ServerConnection) -> Union[Client, None]:
+        """
+        Get a registered client by its websocket connection.
+
+        :param websocket: The websocket connection of the client.
+        """
+
+        return self._clients.get(websocket)
+
+    def broadcast(
+        self,
+        payload: bytes,
+        coalesce_key: Union[str, None] = None,
+        droppable: bool = False,
+    ) -> None:
+        """
+        Queue an encoded message for every connected client.
+
+        :param payload: The UTF-8 JSON encoded message.
+        :param coalesce_key: Key of a message that supersedes queued messages with
+            the same key.
+        :param droppable: Whether the message may be dropped when a client's queue
+            is full. Only transient reports should be, never state changes.
+        """
+
+        for client in self._clients.values():
+            client.send(payload, droppable, coalesce_key)
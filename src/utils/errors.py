@@ -65,6 +65,22 @@ class PlaybackDeviceAmbiguousError(EventError):
         self.type = ErrorEvent.PLAYBACK_DEVICE_AMBIGUOUS
 
 
+class VoiceLimitError(EventError):
+    """Raised when no voice is available to play a sound."""
+
+    def __init__(self, max_voices: int):
+        super().__init__(f"Voice limit of {max_voices} reached")
+        self.type = ErrorEvent.VOICE_LIMIT_REACHED
+
+
+class QueueFullError(EventError):
+    """Raised when the play queue has no room for another sound."""
+
+    def __init__(self, max_queued: int):
+        super().__init__(f"Queue limit of {max_queued} reached")
+        self.type = ErrorEvent.QUEUE_FULL
+
+
 class UnsupportedEventError(EventError):
     """Raised when the event type is not supported."""
 
@@ -7,15 +7,27 @@ class IncomingEvent(str, Enum):
     """
 
     SOUND_ADD = "SOUND:ADD"
+    SOUND_ADD_BATCH = "SOUND:ADD_BATCH"
     SOUND_UPDATE = "SOUND:UPDATE"
     SOUND_REMOVE = "SOUND:REMOVE"
     SOUND_FETCH = "SOUND:FETCH"
     SOUND_PLAY = "SOUND:PLAY"
     SOUND_STOP = "SOUND:STOP"
+    SOUND_SEEK = "SOUND:SEEK"
+    SOUND_ENQUEUE = "SOUND:ENQUEUE"
+
+    QUEUE_FETCH = "QUEUE:FETCH"
+    QUEUE_CLEAR = "QUEUE:CLEAR"
 
     CONFIG_FETCH = "CONFIG:FETCH"
     CONFIG_UPDATE = "CONFIG:UPDATE"
 
+    CACHE_FETCH = "CACHE:FETCH"
+
+    METRICS_FETCH = "METRICS:FETCH"
+
+    DEVICE_REFRESH = "DEVICE:REFRESH"
+
 
 class OutgoingEvent(str, Enum):
     """
@@ -23,15 +35,31 @@ class OutgoingEvent(str, Enum):
     """
 
     SOUND_ADDED = "SOUND:ADDED"
+    SOUND_BATCH_ADDED = "SOUND:BATCH_ADDED"
     SOUND_UPDATED = "SOUND:UPDATED"
+    SOUND_BATCH_UPDATED = "SOUND:BATCH_UPDATED"
     SOUND_REMOVED = "SOUND:REMOVED"
     SOUND_FETCHED = "SOUND:FETCHED"
     SOUND_PLAYING = "SOUND:PLAYING"
     SOUND_STOPPED = "SOUND:STOPPED"
+    SOUND_PROGRESS = "SOUND:PROGRESS"
+    SOUND_SEEKED = "SOUND:SEEKED"
+    SOUND_IGNORED = "SOUND:IGNORED"
+
+    QUEUE_FETCHED = "QUEUE:FETCHED"
+    QUEUE_UPDATED = "QUEUE:UPDATED"
 
     CONFIG_FETCHED = "CONFIG:FETCHED"
     CONFIG_UPDATED = "CONFIG:UPDATED"
 
+    CACHE_FETCHED = "CACHE:FETCHED"
+
+    METRICS_FETCHED = "METRICS:FETCHED"
+
+    EVENT_HANDLED = "EVENT:HANDLED"
+
+    DEVICE_REFRESHED = "DEVICE:REFRESHED"
+
 
 class ErrorEvent(str, Enum):
     """
@@ -47,6 +75,8 @@ class ErrorEvent(str, Enum):
     CONFIG_NOT_FOUND = "ERROR:CONFIG_NOT_FOUND"
     PLAYBACK_DEVICE_NOT_FOUND = "ERROR:PLAYBACK_DEVICE_NOT_FOUND"
     PLAYBACK_DEVICE_AMBIGUOUS = "ERROR:PLAYBACK_DEVICE_AMBIGUOUS"
+    VOICE_LIMIT_REACHED = "ERROR:VOICE_LIMIT_REACHED"
+    QUEUE_FULL = "ERROR:QUEUE_FULL"
 
 
 INCOMING_EVENT_VALUES = {e.value for e in IncomingEvent}
@@ -1,9 +1,27 @@
-import json
+from typing import Union
 
 import websockets
 
+from utils.client_registry import ClientRegistry
+from utils.serializer import serializer
 
-async def send_message(websocket: websockets.ServerConnection, message: json) -> None:
+client_registry = ClientRegistry()
+
+
+def encode_message(message: dict) -> bytes:
+    """
+    Encode a message with the active serializer.
+
+    :param message: The message to encode.
+    """
+
+    if not isinstance(message, dict):
+        raise ValueError("Message must be a dictionary")
+
+    return serializer.encode(message)
+
+
+async def send_message(websocket: websockets.ServerConnection, message: dict) -> None:
     """
     Send a message to the client.
 
@@ -11,7 +29,38 @@ async def send_message(websocket: websockets.ServerConnection, message: json) ->
     :param message: The message to send.
     """
 
-    if not isinstance(message, dict):
-        raise ValueError("Message must be a dictionary")
+    await send_encoded(websocket, encode_message(message))
+
+
+async def send_encoded(websocket: websockets.ServerConnection, payload: bytes) -> None:
+    """
+    Send an already encoded message to the client as a text frame, without
+    encoding it again. Messages to registered clients go through their send
+    queue, so replies stay ordered with broadcasts.
+
+    :param websocket: The websocket connection to send the message to.
+    :param payload: The UTF-8 JSON encoded message.
+    """
+
+    client = client_registry.get(websocket)
+    if client is None:
+        await websocket.send(payload, text=True)
+    else:
+        client.send(payload)
+
+
+def broadcast_message(
+    message: dict, coalesce_key: Union[str, None] = None, droppable: bool = False
+) -> None:
+    """
+    Send a message to every connected client. The message is encoded once, and
+    queued for each client without waiting for any of them.
+
+    :param message: The message to send.
+    :param coalesce_key: Key of a message that supersedes queued messages with
+        the same key, for state where only the latest value matters.
+    :param droppable: Whether a slow client may miss the message, for transient
+        reports that the next one makes obsolete.
+    """
 
-    await websocket.send(json.dumps(message))
+    client_registry.broadcast(encode_message(message), coalesce_key, droppable)
@@ -0,0 +1,151 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Any, Union
+
+CATEGORIES = ("server", "events", "handlers", "database", "config", "audio", "metrics")
+OFF = logging.CRITICAL + 1
+
+
+class Truncated:
+    """
+    Log argument that is only converted to text, and cut to the payload limit,
+    when the record is actually emitted.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Union[int, None] = None) -> None:
+        """
+        Wrap a value to log.
+
+        :param value: The value, usually a raw event payload.
+        :param limit: Maximum number of characters, or None for the default.
+        """
+
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else str(self.value)
+        limit = self.limit if self.limit is not None else payload_limit
+        if len(text) <= limit:
+            return text
+
+        return f"{text[:limit]}… ({len(text)} chars)"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line, for log collectors.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "category": record.name.removeprefix("zound."),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records as they are, so the message is only formatted by the handlers
+    of the listener thread. Only the traceback is rendered on the calling thread,
+    into the exception text of the record, so the queue does not keep the frames
+    of the failed call alive.
+    """
+
+    traceback_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.traceback_formatter.formatException(
+                    record.exc_info
+                )
+            record.exc_info = None
+
+        return record
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """
+    Parse per-category levels such as "events=DEBUG,database=OFF".
+
+    :param spec: Comma-separated category=level pairs.
+    """
+
+    levels = {}
+    for entry in filter(None, spec.split(",")):
+        category, _, level = entry.partition("=")
+        if category not in CATEGORIES:
+            raise ValueError(f"Log category must be one of {CATEGORIES}")
+
+        levels[category] = OFF if level.upper() == "OFF" else level.upper()
+
+    return levels
+
+
+def get_logger(category: str) -> logging.Logger:
+    """
+    Get the logger of a category.
+
+    :param category: One of the log categories.
+    """
+
+    if category not in CATEGORIES:
+        raise ValueError(f"Log category must be one of {CATEGORIES}")
+
+    return logging.getLogger(f"zound.{category}")
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Route every Zound logger through a queue drained by a background thread, so
+    logging never blocks the caller on console or file output. Levels, format
+    and payload limit are read from the environment:
+
+    - ZOUND_LOG_LEVEL: Default level of every category, INFO if unset.
+    - ZOUND_LOG: Per-category levels, such as "events=DEBUG,database=OFF".
+    - ZOUND_LOG_FORMAT: "text" or "json".
+    - ZOUND_LOG_PAYLOAD_LIMIT: Characters of a payload kept in a record.
+    """
+
+    root = logging.getLogger("zound")
+    root.setLevel(os.environ.get("ZOUND_LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+
+    for category, level in parse_levels(os.environ.get("ZOUND_LOG", "")).items():
+        get_logger(category).setLevel(level)
+
+    handler = logging.StreamHandler()
+    if os.environ.get("ZOUND_LOG_FORMAT", "text") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+        )
+
+    records = queue.SimpleQueue()
+    root.addHandler(RecordQueueHandler(records))
+
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
+
+
+payload_limit = int(os.environ.get("ZOUND_LOG_PAYLOAD_LIMIT", "200"))
+log_listener = configure_logging()
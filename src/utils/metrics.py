@@ -0,0 +1,292 @@
+import math
+import os
+import threading
+from typing import Union
+
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    math.inf,
+)
+
+
+class Histogram:
+    """
+    Thread-safe histogram of durations in seconds, optionally split into one
+    series per label value, such as the event type of a handler.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label: Union[str, None] = None,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """
+        Initialize the histogram.
+
+        :param name: Name of the metric, without the namespace.
+        :param description: Help text of the metric.
+        :param label: Name of the label that splits the series, if any.
+        :param buckets: Upper bounds of the buckets, ending with infinity.
+        """
+
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = buckets
+
+        self._series: dict[Union[str, None], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, label: Union[str, None] = None) -> None:
+        """
+        Record a duration.
+
+        :param seconds: The duration in seconds.
+        :param label: Value of the label, if the histogram has one.
+        """
+
+        index = next(i for i, bound in enumerate(self.buckets) if seconds <= bound)
+
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = [[0] * len(self.buckets), 0, 0.0]
+
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += seconds
+
+    def snapshot(self) -> dict:
+        """
+        Get the count, sum, cumulative buckets and estimated percentiles of every
+        series, keyed by label value.
+        """
+
+        with self._lock:
+            series = {
+                label: (list(counts), count, total)
+                for label, (counts, count, total) in self._series.items()
+            }
+
+        return {
+            label or "": {
+                "count": count,
+                "sum": total,
+                "buckets": list(zip(self.__bounds(), self.__cumulative(counts))),
+                "p50": self.__quantile(counts, count, 0.5),
+                "p95": self.__quantile(counts, count, 0.95),
+                "p99": self.__quantile(counts, count, 0.99),
+            }
+            for label, (counts, count, total) in series.items()
+        }
+
+    def __bounds(self) -> list[str]:
+        return ["+Inf" if math.isinf(bound) else str(bound) for bound in self.buckets]
+
+    def __cumulative(self, counts: list[int]) -> list[int]:
+        cumulative = []
+        total = 0
+        for count in counts:
+            total += count
+            cumulative.append(total)
+
+        return cumulative
+
+    def __quantile(
+        self, counts: list[int], count: int, quantile: float
+    ) -> Union[float, None]:
+        # Upper bound of the bucket the quantile falls in, or the largest finite
+        # bound when it falls in the overflow bucket.
+        if count == 0:
+            return None
+
+        target = quantile * count
+        for bound, cumulative in zip(self.buckets, self.__cumulative(counts)):
+            if cumulative >= target:
+                return bound if not math.isinf(bound) else self.buckets[-2]
+
+        return self.buckets[-2]
+
+
+class Counter:
+    """
+    Thread-safe counter of events such as buffer underruns.
+    """
+
+    def __init__(self, name: str, description: str) -> None:
+        """
+        Initialize the counter.
+
+        :param name: Name of the metric, without the namespace.
+        :param description: Help text of the metric.
+        """
+
+        self.name = name
+        self.description = description
+        self.value = 0
+
+        self._lock = threading.Lock()
+
+    def increment(self, amount: int = 1) -> None:
+        """
+        Increase the counter.
+
+        :param amount: The amount to add.
+        """
+
+        with self._lock:
+            self.value += amount
+
+
+class Metrics:
+    """
+    Registry of the latency histograms and event counters of the server, which
+    can be fetched as JSON or written in the Prometheus text format.
+    """
+
+    namespace = "zound"
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, Histogram] = {}
+        self._counters: dict[str, Counter] = {}
+
+    def histogram(
+        self, name: str, description: str, label: Union[str, None] = None
+    ) -> Histogram:
+        """
+        Register a histogram, or get the one already registered with this name.
+
+        :param name: Name of the metric, without the namespace.
+        :param description: Help text of the metric.
+        :param label: Name of the label that splits the series, if any.
+        """
+
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, description, label)
+
+        return self._histograms[name]
+
+    def counter(self, name: str, description: str) -> Counter:
+        """
+        Register a counter, or get the one already registered with this name.
+
+        :param name: Name of the metric, without the namespace.
+        :param description: Help text of the metric.
+        """
+
+        if name not in self._counters:
+            self._counters[name] = Counter(name, description)
+
+        return self._counters[name]
+
+    def snapshot(self) -> dict:
+        """
+        Get every histogram and counter.
+        """
+
+        return {
+            "histograms": {
+                name: histogram.snapshot()
+                for name, histogram in self._histograms.items()
+            },
+            "counters": {
+                name: counter.value for name, counter in self._counters.items()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Format every histogram and counter in the Prometheus text format.
+        """
+
+        lines = []
+        for histogram in self._histograms.values():
+            name = f"{self.namespace}_{histogram.name}"
+            lines.append(f"# HELP {name} {histogram.description}")
+            lines.append(f"# TYPE {name} histogram")
+
+            for label, series in histogram.snapshot().items():
+                labels = f'{histogram.label}="{label}",' if histogram.label else ""
+                for bound, cumulative in series["buckets"]:
+                    lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+
+                labels = "{" + labels.rstrip(",") + "}" if labels else ""
+                lines.append(f"{name}_sum{labels} {series['sum']}")
+                lines.append(f"{name}_count{labels} {series['count']}")
+
+        for counter in self._counters.values():
+            name = f"{self.namespace}_{counter.name}"
+            lines.append(f"# HELP {name} {counter.description}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {counter.value}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """
+        Write every metric to a file in the Prometheus text format. The file is
+        replaced atomically, so a scraper never reads a partial dump.
+
+        :param path: Path of the file.
+        """
+
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+
+        os.replace(temporary, path)
+
+
+metrics = Metrics()
+
+EVENT_DISPATCH = metrics.histogram(
+    "event_dispatch_seconds",
+    "Time from receiving an event to starting its handler.",
+)
+HANDLER_DURATION = metrics.histogram(
+    "handler_duration_seconds", "Time spent in an event handler.", "event"
+)
+TRIGGER_LATENCY = metrics.histogram(
+    "trigger_latency_seconds",
+    "Time from a SOUND:PLAY handler until the first block of the voice is due "
+    "at the output, including audio already queued ahead of it.",
+)
+DEVICE_OPEN = metrics.histogram(
+    "device_open_seconds", "Time to resolve the playback device and open streams."
+)
+SOUND_LOAD = metrics.histogram(
+    "sound_load_seconds", "Time to map or decode a sound before it can play."
+)
+BLOCK_RENDER = metrics.histogram(
+    "block_render_seconds", "Time to mix and resample one block of every voice."
+)
+
+LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds", "How late the event loop wakes up a sleeping task."
+)
+
+OUTPUT_UNDERFLOWS = metrics.counter(
+    "output_underflows_total", "Output underflows reported by the audio device."
+)
+OUTPUT_OVERFLOWS = metrics.counter(
+    "output_overflows_total", "Output overflows reported by the audio device."
+)
+BUFFER_UNDERRUNS = metrics.counter(
+    "buffer_underruns_total", "Stream callbacks that found the ring buffer short."
+)
@@ -0,0 +1,55 @@
+from typing import Hashable, Union
+
+
+class PayloadCache:
+    """
+    Cache of encoded messages that rarely change, such as the sound catalog or
+    the config, so sending them again does not re-serialize them.
+
+    Each payload is stored with the version of the data it was built from, and is
+    a miss when requested for a different version or after being invalidated.
+    """
+
+    def __init__(self) -> None:
+        self._payloads: dict[str, tuple[Hashable, bytes]] = {}
+
+    def get(self, key: str, version: Hashable = None) -> Union[bytes, None]:
+        """
+        Get an encoded payload, or None if it is missing or out of date.
+
+        :param key: Name of the payload.
+        :param version: Version of the data the payload must reflect.
+        """
+
+        cached = self._payloads.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        return None
+
+    def put(self, key: str, payload: bytes, version: Hashable = None) -> bytes:
+        """
+        Store an encoded payload, returning it.
+
+        :param key: Name of the payload.
+        :param payload: The encoded payload.
+        :param version: Version of the data the payload reflects.
+        """
+
+        self._payloads[key] = (version, payload)
+        return payload
+
+    def invalidate(self, key: Union[str, None] = None) -> None:
+        """
+        Drop a cached payload, or every payload without a key.
+
+        :param key: Name of the payload.
+        """
+
+        if key is None:
+            self._payloads.clear()
+        else:
+            self._payloads.pop(key, None)
+
+
+payload_cache = PayloadCache()
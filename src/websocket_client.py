@@ -1,90 +1,134 @@
+import argparse
 import asyncio
-import json
+import itertools
+from typing import Union
 
-from websockets import connect
+from websockets import ClientConnection, ConnectionClosed, connect
 
-from utils.events import IncomingEvent
-from utils.functions import send_message
+from utils.events import IncomingEvent, OutgoingEvent
+from utils.serializer import serializer
 
 
-async def hello():
-    async with connect("ws://localhost:4358") as websocket:
-        await send_message(
-            websocket,
-            {
-                "type": IncomingEvent.SOUND_FETCH,
-            },
-        )
+class ZoundClient:
+    """
+    Client of the Zound websocket API.
 
-        all_sounds = json.loads(await websocket.recv())
-        first_sound = all_sounds["sounds"][1]["id"] if all_sounds else None
-
-        # await send_message(
-        #     websocket,
-        #     {
-        #         "type": IncomingEvent.SOUND_ADD,
-        #         "data": {
-        #             "name": "plakton-augh",
-        #             "path": "C:\\Users\\Gabriel\\Music\\audios\\plankton-oooooh.mp3",
-        #         },
-        #     },
-        # )
-
-        await send_message(
-            websocket,
-            {
-                "type": IncomingEvent.SOUND_PLAY,
-                "soundId": first_sound,
-            },
-        )
+    Every event sent carries a requestId, so its EVENT:HANDLED acknowledgement or
+    error reply can be matched to it while broadcasts keep arriving. Messages that
+    are not replies are queued in messages, unless the client only counts them.
+    """
 
-        await asyncio.sleep(1)
-        await send_message(
-            websocket,
-            {
-                "type": IncomingEvent.CONFIG_UPDATE,
-                "config": {
-                    "headphone_volume": 0.1,
-                    "microphone_volume": 0.1,
-                    "headphone_muted": False,
-                },
-            },
-        )
+    def __init__(self, websocket: ClientConnection, keep_messages: bool = True) -> None:
+        """
+        Initialize the client and start reading messages.
+
+        :param websocket: The websocket connection to the server.
+        :param keep_messages: Whether to queue the messages that are not replies.
+        """
 
-        await asyncio.sleep(1)
-        await send_message(
-            websocket,
-            {
-                "type": IncomingEvent.CONFIG_UPDATE,
-                "config": {
-                    "headphone_volume": 0.2,
-                    "microphone_volume": 0.2,
-                    "headphone_muted": True,
-                },
-            },
+        self.websocket = websocket
+        self.received = 0
+        self.messages: Union[asyncio.Queue, None] = (
+            asyncio.Queue() if keep_messages else None
         )
 
-        await asyncio.sleep(1)
-        await send_message(
-            websocket,
-            {
-                "type": IncomingEvent.CONFIG_UPDATE,
-                "config": {
-                    "headphone_volume": 0.5,
-                    "microphone_volume": 0.5,
-                    "headphone_muted": False,
-                },
-            },
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._reader = asyncio.create_task(self.__read())
+
+    @classmethod
+    async def connect(cls, url: str, keep_messages: bool = True) -> "ZoundClient":
+        """
+        Connect to a Zound server.
+
+        :param url: The websocket URL of the server.
+        :param keep_messages: Whether to queue the messages that are not replies.
+        """
+
+        return cls(await connect(url, max_size=None), keep_messages)
+
+    async def send(self, event: dict) -> asyncio.Future:
+        """
+        Send an event without waiting for it to be handled. Returns a future that
+        resolves to its acknowledgement or error reply.
+
+        :param event: The event to send.
+        """
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        await self.websocket.send(
+            serializer.encode({**event, "requestId": request_id}), text=True
         )
+        return future
+
+    async def request(self, event: dict) -> dict:
+        """
+        Send an event and wait for it to be handled.
+
+        :param event: The event to send.
+        """
+
+        return await (await self.send(event))
+
+    async def wait_for(self, message_type: str) -> dict:
+        """
+        Wait for a message of the given type, discarding the ones before it.
+
+        :param message_type: Type of the message to wait for.
+        """
 
         while True:
-            try:
-                message = await websocket.recv()
-                print(f"Received message: {message}")
-            except Exception as e:
-                print(f"Error receiving message: {e}")
-                break
+            message = await self.messages.get()
+            if message["type"] == message_type:
+                return message
+
+    async def close(self) -> None:
+        """
+        Close the connection.
+        """
+
+        await self.websocket.close()
+        await self._reader
+
+    async def __read(self) -> None:
+        try:
+            async for data in self.websocket:
+                self.received += 1
+                message = serializer.decode(data)
+
+                future = self._pending.pop(message.get("requestId"), None)
+                if future is not None:
+                    future.set_result(message)
+                elif self.messages is not None:
+                    self.messages.put_nowait(message)
+        except ConnectionClosed:
+            pass
+        finally:
+            for future in self._pending.values():
+                future.cancel()
+
+
+async def main(url: str) -> None:
+    client = await ZoundClient.connect(url)
+
+    await client.request({"type": IncomingEvent.SOUND_FETCH})
+    sounds = (await client.wait_for(OutgoingEvent.SOUND_FETCHED))["sounds"]
+    if sounds:
+        reply = await client.request(
+            {"type": IncomingEvent.SOUND_PLAY, "soundId": sounds[0]["id"]}
+        )
+        print(f"Played {sounds[0]['name']}: {reply}")
+
+    while True:
+        print(f"Received message: {await client.messages.get()}")
 
 
 if __name__ == "__main__":
-    asyncio.run(hello())
+    parser = argparse.ArgumentParser(
+        description="Play the first sound of a Zound server and print its messages."
+    )
+    parser.add_argument("--url", default="ws://localhost:4358")
+    asyncio.run(main(parser.parse_args().url))